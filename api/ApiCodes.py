@@ -1,3 +1,11 @@
 """Module to store common api returns."""
 NO_AUTH_CODE = {"error": "No authentication-code in headers"}, 460
 INVALID_CREDENTIALS = {"error": "Invalid authentication credential"}, 461
+UPSTREAM_UNAVAILABLE = {"error": "Google People API unavailable"}, 466
+QUEUE_FULL = {"error": "Too many jobs being processed, try again later"}, 503
+INVALID_REPORT_FORMAT = {"error": "Unsupported report format"}, 467
+INVALID_CURSOR = {"error": "Invalid pagination cursor"}, 468
+INVALID_FIELDS = {"error": "Unknown contact fields"}, 469
+INVALID_GROUPING = {"error": "Invalid groupBy, sort or top"}, 470
+INVALID_SEARCH = {"error": "Missing search query or filters"}, 471
+TOO_MANY_PERSON_IDS = {"error": "Too many personIds in a single request"}, 472
@@ -0,0 +1,354 @@
+"""Module with the cache backends shared by the api namespaces.
+
+Values must be json serializable, so the same entry can live in the
+in-process tier and in the shared (Redis compatible) tier.
+"""
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from api.codec import json_codec
+
+
+def json_size(value):
+    """Return the length of the json encoding of value."""
+    return len(json_codec.dumps(value))
+
+
+class MemoryCache:
+    """In-process cache with per-entry TTL, LRU eviction and a memory budget.
+
+    The size of an entry is estimated by ``sizeof``, the length of its
+    json encoding by default, which is good enough to keep the process
+    memory bounded. Caches of big values should give a cheaper estimation.
+
+    Attributes
+    ----------
+    max_bytes : int
+        Memory budget, least recently used entries are evicted past it.
+    default_ttl : float
+        Seconds an entry lives when ``set`` is called without ttl.
+    sizeof : Callable[[object], int]
+        Estimated size in bytes of a value.
+    hits, misses, evictions : int
+        Usage counters.
+
+    """
+
+    def __init__(
+        self, max_bytes=64 * 1024 * 1024, default_ttl=30, sizeof=json_size
+    ):
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored under key, or None if missing/expired."""
+        with self._lock:
+            entry = self._entries.get(key, None)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def set(self, key, value, ttl=None, size=None):
+        """Store value under key.
+
+        Parameters
+        ----------
+        key : str
+            Cache key.
+        value : object
+            Json serializable value.
+        ttl : float
+            Seconds to live, defaults to ``default_ttl``.
+        size : int
+            Size in bytes, when already known by the caller.
+
+        """
+        if size is None:
+            size = self.sizeof(value)
+        if ttl is None:
+            ttl = self.default_ttl
+
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return
+
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self._size += size
+
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove key from the cache."""
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry[1]
+
+    def stats(self):
+        """Return the usage counters.
+
+        Returns
+        -------
+        dict
+            hits, misses, evictions, entries and bytes.
+
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+            }
+
+
+class RedisCache:
+    """Cache stored in a Redis compatible server, shared by all workers.
+
+    Attributes
+    ----------
+    client : object
+        ``redis.Redis`` instance, or anything with get/setex/delete.
+    default_ttl : float
+        Seconds an entry lives when ``set`` is called without ttl.
+    prefix : str
+        Prepended to every key.
+    hits, misses : int
+        Usage counters of this process.
+
+    """
+
+    def __init__(self, client, default_ttl=30, prefix="orgcontact:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def from_url(url, **kwargs):
+        """Create a RedisCache connected to url.
+
+        Raises
+        ------
+        ImportError
+            When the ``redis`` package is not installed.
+
+        """
+        import redis
+
+        return RedisCache(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        """Return the value stored under key, or None if missing/expired."""
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return json_codec.loads(raw)
+
+    def set(self, key, value, ttl=None, size=None, encoded=None):
+        """Store value under key, see ``MemoryCache.set``.
+
+        encoded is the json encoding of value, when the caller already has
+        it.
+        """
+        if ttl is None:
+            ttl = self.default_ttl
+        if encoded is None:
+            encoded = json_codec.dumps(value)
+        self.client.setex(self.prefix + key, max(1, int(ttl)), encoded)
+
+    def delete(self, key):
+        """Remove key from the cache."""
+        self.client.delete(self.prefix + key)
+
+    def stats(self):
+        """Return the usage counters of this process."""
+        return {"hits": self.hits, "misses": self.misses}
+
+
+class FakeRedis:
+    """Local stand-in of a Redis server, with the calls RedisCache makes."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the raw bytes stored under key, or None."""
+        with self._lock:
+            entry = self._data.get(key, None)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._data[key]
+                return None
+            return entry[1]
+
+    def setex(self, key, ttl, value):
+        """Store value under key for ttl seconds."""
+        if isinstance(value, str):
+            value = value.encode("utf-8")
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, *keys):
+        """Remove keys."""
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class TieredCache:
+    """Read-through pair of caches, checked from the fastest to the shared.
+
+    A hit in the shared tier fills the local one, so the next request served
+    by the same worker does not leave the process.
+
+    Attributes
+    ----------
+    local : MemoryCache
+        In-process tier, None to only use the shared one.
+    shared : RedisCache
+        Tier shared by all workers, optional.
+
+    """
+
+    def __init__(self, local, shared=None):
+        self.local = local
+        self.shared = shared
+
+    def get(self, key):
+        """Return the value stored under key, or None."""
+        value = None
+        if self.local is not None:
+            value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None and self.local is not None:
+                self.local.set(key, value)
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key in every tier."""
+        if self.shared is not None:
+            # Codificado uma vez so, o tamanho sai de graca
+            encoded = json_codec.dumps(value)
+            self.shared.set(key, value, ttl, encoded=encoded)
+            if self.local is not None:
+                self.local.set(key, value, ttl, size=len(encoded))
+        else:
+            self.local.set(key, value, ttl)
+
+    def delete(self, key):
+        """Remove key from every tier."""
+        if self.local is not None:
+            self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear_local(self):
+        """Remove every entry of the in-process tier."""
+        if self.local is not None:
+            self.local.clear()
+
+    def stats(self):
+        """Return the usage counters of every tier."""
+        stats = {}
+        if self.local is not None:
+            stats["local"] = self.local.stats()
+        if self.shared is not None:
+            stats["shared"] = self.shared.stats()
+        return stats
+
+
+def build_cache(
+    prefix, default_ttl, max_bytes, sizeof=json_size, shared_only=False
+):
+    """Create a TieredCache configured by environment variables.
+
+    ``<PREFIX>_CACHE_TTL`` and ``<PREFIX>_CACHE_MAX_BYTES`` override the
+    defaults. When ``REDIS_URL`` is set, a shared tier is added, unless
+    ``redis`` is not installed or the url is invalid, which is logged.
+
+    Parameters
+    ----------
+    prefix : str
+        Name of the cache, like ``contact``.
+    default_ttl : float
+        Default entry ttl in seconds.
+    max_bytes : int
+        Default in-process memory budget.
+    sizeof : Callable[[object], int]
+        Estimated size of a value, see ``MemoryCache``.
+    shared_only : bool
+        Skip the in-process tier when there is a shared one. For values
+        changed by a worker that the other workers must not serve stale,
+        since ``delete`` only reaches the local tier of the calling worker.
+
+    Returns
+    -------
+    TieredCache
+        The configured cache.
+
+    """
+    env = prefix.upper()
+    ttl = float(os.getenv(env + "_CACHE_TTL", default_ttl))
+    local = MemoryCache(
+        int(os.getenv(env + "_CACHE_MAX_BYTES", max_bytes)), ttl, sizeof
+    )
+
+    shared = None
+    if os.getenv("REDIS_URL"):
+        try:
+            shared = RedisCache.from_url(
+                os.getenv("REDIS_URL"),
+                default_ttl=ttl,
+                prefix="orgcontact:{}:".format(prefix),
+            )
+        except (ImportError, ValueError) as e:
+            logging.warning(
+                "[cache.py] REDIS_URL is set but the %s cache stays in process: %s",
+                prefix,
+                e,
+            )
+
+    if shared is not None and shared_only:
+        local = None
+
+    return TieredCache(local, shared)
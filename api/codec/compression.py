@@ -0,0 +1,107 @@
+"""Module to compress api responses, negotiated by ``Accept-Encoding``.
+
+gzip is always available, brotli (``br``) needs the ``brotli`` package and
+is preferred when the client accepts both.
+"""
+import gzip
+import importlib.util
+import os
+
+from flask import request
+
+from api.metrics.metrics import (
+    RESPONSE_BYTES,
+    RESPONSE_WIRE_BYTES,
+    current_namespace,
+    timed,
+)
+
+# Smaller bodies fit in a packet anyway, compressing them only costs CPU
+COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "5"))
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/plain", "text/csv")
+
+
+def _gzip(data):
+    return gzip.compress(data, GZIP_LEVEL)
+
+
+def _brotli(data):
+    import brotli
+
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+# Encodings in order of preference, with the package they need
+ENCODINGS = [("br", _brotli, "brotli"), ("gzip", _gzip, None)]
+
+
+def available_encodings():
+    """Return the encodings that can be used, in order of preference."""
+    return [
+        (name, compress)
+        for name, compress, dependency in ENCODINGS
+        if dependency is None or importlib.util.find_spec(dependency)
+    ]
+
+
+def compress_response(response):
+    """Compress a response body, to be used as a Flask ``after_request``.
+
+    Only successful responses of ``COMPRESSIBLE_MIMETYPES`` with at least
+    ``COMPRESS_MIN_SIZE`` bytes are compressed. The ETag of a compressed
+    response becomes weak, since the bytes differ from the identity ones,
+    and ``If-None-Match`` keeps matching with the weak comparison.
+
+    Parameters
+    ----------
+    response : flask.Response
+        The response to be sent.
+
+    Returns
+    -------
+    flask.Response
+        The same response, compressed when possible.
+
+    """
+    if (
+        response.direct_passthrough
+        or not 200 <= response.status_code < 300
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    namespace = current_namespace()
+    encodings = dict(available_encodings())
+    encoding = request.accept_encodings.best_match(
+        list(encodings), default=None
+    )
+
+    if encoding is not None:
+        with timed("compress", namespace):
+            compressed = encodings[encoding](data)
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+
+        etag, weak = response.get_etag()
+        if etag is not None and not weak:
+            response.set_etag(etag, weak=True)
+
+    RESPONSE_BYTES.inc(
+        len(data), namespace=namespace, encoding=encoding or "identity"
+    )
+    RESPONSE_WIRE_BYTES.inc(
+        response.content_length,
+        namespace=namespace,
+        encoding=encoding or "identity",
+    )
+    return response
@@ -0,0 +1,137 @@
+"""Module with the JSON codec of People API bodies and api responses.
+
+``JSON_CODEC`` picks the codec: ``orjson``, ``ujson`` or ``json``. The
+default, ``auto``, uses the first of them that is installed. Every codec
+decodes ``bytes`` directly, without building the decoded ``str`` first,
+and encodes to compact UTF-8 ``bytes``.
+"""
+import importlib.util
+import json
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import make_response
+
+from api.metrics.metrics import timed
+
+JSON_CODEC = os.getenv("JSON_CODEC", "auto")
+
+Codec = namedtuple("Codec", ["name", "loads", "dumps"])
+
+# Factories of each codec, in order of preference, see ``register_codec``
+CODECS = OrderedDict()
+
+
+def register_codec(name, factory, dependency=None):
+    """Register a JSON codec.
+
+    Parameters
+    ----------
+    name : str
+        Codec name, as given in ``JSON_CODEC``.
+    factory : Callable
+        Called on first use, returns the ``(loads, dumps)`` functions.
+        ``loads`` receives ``bytes`` or ``str``, ``dumps`` returns ``bytes``.
+    dependency : str
+        Module that must be installed to use the codec.
+
+    """
+    CODECS[name] = (factory, dependency)
+
+
+def _orjson():
+    import orjson
+
+    def dumps(data):
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+    return orjson.loads, dumps
+
+
+def _ujson():
+    import ujson
+
+    def dumps(data):
+        return ujson.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    return ujson.loads, dumps
+
+
+def _json():
+    def dumps(data):
+        return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+    return json.loads, dumps
+
+
+register_codec("orjson", _orjson, "orjson")
+register_codec("ujson", _ujson, "ujson")
+register_codec("json", _json)
+
+
+def available_codecs():
+    """Return the names of the registered codecs that can be used."""
+    return [
+        name
+        for name, (_, dependency) in CODECS.items()
+        if dependency is None or importlib.util.find_spec(dependency)
+    ]
+
+
+def get_codec(name=JSON_CODEC):
+    """Build a codec by its name.
+
+    Parameters
+    ----------
+    name : str
+        A registered codec, or ``auto`` for the first one available.
+
+    Returns
+    -------
+    Codec
+        The codec, falling back to ``json`` when the one asked for is not
+        installed.
+
+    """
+    available = available_codecs()
+    if name not in available:
+        name = available[0] if name == "auto" else "json"
+
+    loads, dumps = CODECS[name][0]()
+    return Codec(name, loads, dumps)
+
+
+_codec = None
+_lock = threading.Lock()
+
+
+def _current():
+    global _codec
+
+    if _codec is None:
+        with _lock:
+            if _codec is None:
+                _codec = get_codec()
+    return _codec
+
+
+def loads(data):
+    """Decode a JSON document, given as ``bytes`` or ``str``."""
+    return _current().loads(data)
+
+
+def dumps(data):
+    """Encode an object as a compact JSON document in UTF-8 ``bytes``."""
+    return _current().dumps(data)
+
+
+def output_json(data, code, headers=None):
+    """Flask-RESTPlus representation of ``application/json`` responses."""
+    with timed("response_encode"):
+        body = dumps(data)
+
+    response = make_response(body, code)
+    response.headers.extend(headers or {})
+    response.mimetype = "application/json"
+    return response
@@ -1,19 +1,339 @@
 """Module for contact api."""
 import requests
+import base64
+import binascii
+import hashlib
+import heapq
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from flask import request
 from api.server import api_blueprint
 from flask_restplus import Resource, reqparse, fields
-from api.models.Contact import Contact
+from api.models.ContactData import MISSING_VALUES, ContactData
+from api.models.Statistics import ContactStatistics
+from api.upstream.people_client import POOL_SIZE, get_client
+from api.upstream.async_people_client import gather_get, is_enabled
+from api.upstream.person_fields import (
+    CONTACT_FIELDS,
+    FULL_PERSON_FIELDS,
+    filled_fields,
+    person_fields_mask,
+)
+from api.sync.snapshot_store import Snapshot, snapshots, snapshot_key
+from api.search.contact_index import FILTER_FIELDS, get_index
+from api.cache.cache import build_cache
+from api.codec import json_codec
+from api.metrics.metrics import (
+    CONTACTS_PER_REQUEST,
+    UPSTREAM_PAYLOAD_BYTES,
+    UPSTREAM_RESPONSES,
+    current_namespace,
+    timed,
+)
+
+from api.ApiCodes import (
+    NO_AUTH_CODE,
+    INVALID_CREDENTIALS,
+    INVALID_CURSOR,
+    INVALID_FIELDS,
+    INVALID_GROUPING,
+    INVALID_SEARCH,
+    TOO_MANY_PERSON_IDS,
+    UPSTREAM_UNAVAILABLE,
+)
 
-from api.ApiCodes import NO_AUTH_CODE, INVALID_CREDENTIALS
+# Google People API caps connections.list at 1000 connections per page.
+MAX_PAGE_SIZE = 1000
+PAGE_SIZE = int(os.getenv("PEOPLE_PAGE_SIZE", MAX_PAGE_SIZE))
+# people:batchGet accepts up to 200 resource names per call.
+MAX_BATCH_SIZE = 200
+# personIds accepted by a single GET /contact, 5 batchGet calls by default
+MAX_PERSON_IDS = int(os.getenv("MAX_PERSON_IDS", 5 * MAX_BATCH_SIZE))
+
+# Contacts per page of GET /contact?limit=
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+# groupBy values of GET /contact, to ContactStatistics dimensions
+GROUP_BY_DIMENSIONS = {
+    "domain": "domain",
+    "organization": "organization",
+    "job": "jobtitle",
+    "city": "city",
+    "region": "region",
+}
+GROUP_SORTS = ("size", "name")
 
 contact_namespace = api_blueprint.namespace(
     "contact", description="Read and manage Contacts"
 )
 
+# Estimated json bytes of a normalized contact, about 210 in the benchmark
+# payloads, so a contact list is not encoded just to be measured
+CONTACT_SIZE_ESTIMATE = 256
+
+
+def _contacts_size(objects):
+    return CONTACT_SIZE_ESTIMATE * len(objects["contacts"])
+
+
+# Normalized contact lists, shared by /contact, /user and /report calls made
+# by the same user in a short time window.
+contact_cache = build_cache(
+    "contact", default_ttl=30, max_bytes=64 << 20, sizeof=_contacts_size
+)
+
+# Resource name of the user owning each access token, by token digest
+token_owners = build_cache("token_owner", default_ttl=600, max_bytes=1 << 20)
+
+# Fetches the next connections page while the current one is parsed, only
+# used with PEOPLE_ASYNC=true
+_prefetch = ThreadPoolExecutor(
+    max_workers=POOL_SIZE, thread_name_prefix="people-prefetch"
+)
+
+
+def _call_upstream(path, token, params=None, namespace=None):
+    """Make a People API call, recording its latency, status and size.
+
+    Parameters
+    ----------
+    path : str
+        Path after the api root.
+    token : str
+        OAuth2 access token given by google.
+    params : Union[dict, list]
+        Query string parameters.
+    namespace : str
+        Metrics namespace, required outside of the request thread.
+
+    Returns
+    -------
+    dict
+        The decoded response body.
+
+    Raises
+    ------
+    requests.exceptions.RequestException
+        When the upstream can not be reached or times out.
+
+    """
+    if namespace is None:
+        namespace = current_namespace()
+
+    with timed("upstream_fetch", namespace):
+        r = get_client().get(path, token, params)
+
+    UPSTREAM_RESPONSES.inc(namespace=namespace, status=r.status_code)
+    UPSTREAM_PAYLOAD_BYTES.observe(len(r.content), namespace=namespace)
+
+    return json_codec.loads(r.content)
+
+
+def _token_owner(token, namespace=None):
+    """Get the resource name of the user owning an access token.
+
+    Access tokens rotate about every hour, so snapshots and cached contacts
+    are keyed by their owner instead. The owner is asked to ``people/me``
+    once per token and kept in ``token_owners``.
+
+    Parameters
+    ----------
+    token : str
+        OAuth2 access token given by google.
+    namespace : str
+        Metrics namespace, see ``_call_upstream``.
+
+    Returns
+    -------
+    str
+        The owner, like ``people/123``, or the token itself when it can not
+        be resolved, so its contacts are only shared with the same token.
+
+    """
+    digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    owner = token_owners.get(digest)
+
+    if owner is None:
+        try:
+            json_data = _call_upstream(
+                "/people/me", token, {"personFields": "metadata"}, namespace
+            )
+        except requests.exceptions.RequestException:
+            return token
+
+        owner = json_data.get("resourceName", None)
+        if owner is None:
+            return token
+        token_owners.set(digest, owner)
+
+    return owner
+
+
+def _encode_cursor(key):
+    return base64.urlsafe_b64encode(
+        json.dumps(key, separators=(",", ":")).encode("utf-8")
+    ).decode("ascii")
+
+
+def _decode_cursor(cursor, size):
+    """Decode a cursor of ``_encode_cursor``.
+
+    Returns
+    -------
+    tuple
+        The sort key of the last contact of the previous page, or None when
+        the cursor is not valid or not ``size`` long.
+
+    """
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError):
+        return None
+    if (
+        not isinstance(key, list)
+        or len(key) != size
+        or not all(isinstance(k, str) for k in key)
+    ):
+        return None
+    return tuple(key)
+
+
+def _select_fields(fields):
+    """Check the fields of a ``fields=`` projection.
+
+    Returns
+    -------
+    List[str]
+        The fields in ``CONTACT_FIELDS`` order, id included, or None when a
+        field is unknown.
+
+    """
+    if any(field not in CONTACT_FIELDS for field in fields):
+        return None
+    return [f for f in CONTACT_FIELDS if f == "id" or f in fields]
+
+
+def _project(contacts, fields):
+    if fields is None:
+        return contacts
+    return [{f: contact[f] for f in fields} for contact in contacts]
+
+
+def _narrow(objects, person_fields):
+    """Project contacts fetched with every personField to a narrower mask.
+
+    The fields the mask does not fill get their missing values, so the
+    contacts are the same as if fetched with the mask.
+
+    Parameters
+    ----------
+    objects : dict
+        {"contacts": [contact1, ...]} fetched with ``FULL_PERSON_FIELDS``.
+    person_fields : str
+        Narrower personFields mask.
+
+    Returns
+    -------
+    dict
+        {"contacts": [contact1, ...]} with new contact dicts.
+
+    """
+    missing = {
+        field: MISSING_VALUES[field]
+        for field in CONTACT_FIELDS
+        if field not in filled_fields(person_fields)
+    }
+    return {
+        "contacts": [
+            {**contact, **missing} for contact in objects["contacts"]
+        ]
+    }
+
+
+def _fetch_fields(fields, dimension):
+    """Get the contact fields to fetch to project and group the contacts.
+
+    Returns
+    -------
+    List[str]
+        fields plus the ones read by the dimension, or None when every
+        field is needed.
+
+    """
+    if fields is None:
+        return None
+    required = ContactStatistics.required_fields((dimension,))
+    if required is None:
+        return None
+    return list(fields) + [f for f in required if f not in fields]
+
+
+def _iter_upstream(calls):
+    """Make People API calls one after the other, as they are consumed.
+
+    Parameters
+    ----------
+    calls : List[tuple]
+        (path, token, params) of each call.
+
+    Yields
+    ------
+    Union[dict, Exception]
+        The decoded response body of each call, or the
+        ``requests.exceptions.RequestException`` it raised.
+
+    """
+    for call in calls:
+        try:
+            yield _call_upstream(*call)
+        except requests.exceptions.RequestException as e:
+            yield e
+
+
+def _gather_upstream(calls):
+    """Make People API calls concurrently through the async client.
+
+    Parameters
+    ----------
+    calls : List[tuple]
+        (path, token, params) of each call.
+
+    Returns
+    -------
+    List[Union[dict, Exception]]
+        Same as ``_iter_upstream``, but with every call already done.
+
+    """
+    namespace = current_namespace()
+
+    with timed("upstream_fetch", namespace):
+        responses = gather_get(calls)
+
+    results = []
+    for r in responses:
+        if isinstance(r, Exception):
+            results.append(r)
+            continue
+
+        UPSTREAM_RESPONSES.inc(namespace=namespace, status=r.status_code)
+        UPSTREAM_PAYLOAD_BYTES.observe(len(r.content), namespace=namespace)
+        results.append(json_codec.loads(r.content))
+
+    return results
+
+
 parser = reqparse.RequestParser()
 parser.add_argument("personId", type=str, location="args")
+parser.add_argument("personIds", type=str, location="args")
+parser.add_argument("grouped", type=str, location="args")
+parser.add_argument("limit", type=int, location="args")
+parser.add_argument("cursor", type=str, location="args")
+parser.add_argument("fields", type=str, location="args")
+parser.add_argument("groupBy", type=str, location="args")
+parser.add_argument("sort", type=str, location="args")
+parser.add_argument("top", type=int, location="args")
 
 
 @contact_namespace.header(
@@ -27,9 +347,22 @@ parser.add_argument("personId", type=str, location="args")
         461: "Invalid Token",
         460: "No authorization-code in headers",
         462: "Another errors",
+        466: "Google People API unavailable",
+        468: "Invalid cursor",
+        472: "Too many personIds",
+        469: "Unknown field in fields",
+        470: "Invalid groupBy, sort or top",
     },
     params={
-        "personID": """If you pass the personId Query it will return an specific contact data. Otherwise it will return a list with all contatcs"""
+        "personID": """If you pass the personId Query it will return an specific contact data. Otherwise it will return a list with all contatcs""",
+        "personIds": """Comma separated personIds, up to 1000 by default. Returns the specific data of each contact and the ids that failed in errors""",
+        "grouped": """Specify grouped=false to get a flat list of contacts, instead of grouped by domain""",
+        "limit": """Contacts per page (up to 1000), ordered by domain and id when grouped or by id otherwise. The response carries next_cursor, null in the last page""",
+        "cursor": """next_cursor of the previous page""",
+        "fields": """Comma separated contact fields to return, like fields=name,email. id is always returned""",
+        "groupBy": """Group the contacts by domain (default), organization, job, city or region""",
+        "sort": """sort=size returns the groups as a list, biggest first, and sort=name in alphabetical order. Can not be used with limit or cursor""",
+        "top": """Only return the top biggest groups (or first ones with sort=name)""",
     },
 )
 @contact_namespace.route("/")
@@ -39,17 +372,14 @@ class ContactApi(Resource):
     def _get_specific_contact(self, personId):
         token = request.headers.get("authorization-code")
         if token is not None:
-            authorization_header = {"Authorization": "Bearer %s" % token}
-
-            r = requests.get(
-                "https://people.googleapis.com/v1/people/{contact_id}?personFields={query}".format(
-                    contact_id=personId,
-                    query="birthdays,addresses,organizations",
-                ),
-                headers=authorization_header,
-            )
-
-            json_data = json.loads(r.text)
+            try:
+                json_data = _call_upstream(
+                    "/people/{contact_id}".format(contact_id=personId),
+                    token,
+                    params={"personFields": "birthdays,addresses,organizations"},
+                )
+            except requests.exceptions.RequestException:
+                return UPSTREAM_UNAVAILABLE
 
             if json_data.get("error", None) is not None:
                 if json_data["error"]["code"] == 401:
@@ -57,57 +387,665 @@ class ContactApi(Resource):
                 else:
                     # Outros tipos de erros
                     return json_data, 462
-            json_data = Contact._get_specific_contact_informations(json_data)
+            json_data = ContactData._get_specific_contact_informations(
+                json_data
+            )
 
             return json_data, 200
         else:
             return NO_AUTH_CODE
 
-    def _get_list_of_contacts(self, grouped=True):
+    def _get_batch_contacts(self, personIds):
+        """Get the specific data of several contacts with people:batchGet.
+
+        The ids are requested in chunks of ``MAX_BATCH_SIZE``, all of them
+        at once when ``PEOPLE_ASYNC`` is enabled. A failed id, or a failed
+        chunk, is reported in ``errors`` without failing the whole batch.
+
+        Parameters
+        ----------
+        personIds : List[str]
+            Contact ids, like the personId query.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                "contacts": {"id1": {"address": ..., ...}},
+                "errors": {"id2": {"code": 404, "message": ...}}
+            }
+        int
+            Response Code
+
+        """
         token = request.headers.get("authorization-code")
-        if token is not None:
-            authorization_header = {"Authorization": "Bearer %s" % token}
+        if token is None:
+            return NO_AUTH_CODE
 
-            r = requests.get(
-                "https://people.googleapis.com/v1/people/me/connections?personFields=names,emailAddresses,photos,addresses,organizations",
-                headers=authorization_header,
+        contacts = {}
+        errors = {}
+
+        chunks = [
+            personIds[start:start + MAX_BATCH_SIZE]
+            for start in range(0, len(personIds), MAX_BATCH_SIZE)
+        ]
+        calls = []
+        for chunk in chunks:
+            params = [("personFields", "birthdays,addresses,organizations")]
+            params.extend(
+                ("resourceNames", "people/" + person_id)
+                for person_id in chunk
             )
+            calls.append(("/people:batchGet", token, params))
+
+        if len(calls) > 1 and is_enabled():
+            results = _gather_upstream(calls)
+        else:
+            results = _iter_upstream(calls)
 
-            json_data = json.loads(r.text)
+        for chunk, json_data in zip(chunks, results):
+            if isinstance(json_data, Exception):
+                for person_id in chunk:
+                    errors[person_id] = UPSTREAM_UNAVAILABLE[0]
+                continue
 
             if json_data.get("error", None) is not None:
                 if json_data["error"]["code"] == 401:
                     return INVALID_CREDENTIALS
+                for person_id in chunk:
+                    errors[person_id] = json_data["error"]
+                continue
+
+            for response in json_data.get("responses", []):
+                person_id = response["requestedResourceName"].split("/", 1)[1]
+                person = response.get("person", None)
+
+                if person is not None:
+                    contacts[
+                        person_id
+                    ] = ContactData._get_specific_contact_informations(person)
                 else:
-                    # Outros tipos de erros
-                    return json_data, 462
+                    errors[person_id] = response.get(
+                        "status", {"code": response.get("httpStatusCode")}
+                    )
+
+        return {"contacts": contacts, "errors": errors}, 200
+
+    def _iter_connections_pages(
+        self,
+        token,
+        page_size=None,
+        sync_token=None,
+        person_fields=FULL_PERSON_FIELDS,
+    ):
+        """Yield every page of ``people/me/connections``, one at a time.
+
+        The generator follows ``nextPageToken`` until the last page, so the
+        caller only needs to keep a single page in memory at a time. A sync
+        token is always requested, and the last page carries the
+        ``nextSyncToken`` to be used in the next call. With ``PEOPLE_ASYNC``
+        enabled, the next page is already being fetched while the caller
+        processes the current one.
+
+        Parameters
+        ----------
+        token : str
+            OAuth2 access token given by google.
+        page_size : int
+            Connections per page, clamped to the People API maximum.
+        sync_token : str
+            When given, only the connections changed after this token are
+            listed, deleted ones flagged in ``metadata.deleted``.
+        person_fields : str
+            personFields mask, see ``person_fields_mask``.
+
+        Yields
+        ------
+        dict
+            Decoded json of each page. A page carrying an ``error`` key is
+            yielded as is and ends the iteration.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            When the upstream can not be reached or times out.
+
+        """
+        if page_size is None:
+            page_size = PAGE_SIZE
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+        params = {
+            "personFields": person_fields,
+            "pageSize": page_size,
+            "requestSyncToken": "true",
+        }
+        if sync_token is not None:
+            params["syncToken"] = sync_token
+
+        path = "/people/me/connections"
+        namespace = current_namespace()
+        prefetch = is_enabled()
+
+        json_data = _call_upstream(path, token, params, namespace)
+        while True:
+            page_token = json_data.get("nextPageToken", None)
+            if json_data.get("error", None) is not None or not page_token:
+                yield json_data
+                return
+
+            # Cada pagina depende do token da anterior, so da para adiantar
+            # a proxima enquanto a atual e processada
+            params = dict(params, pageToken=page_token)
+            if prefetch:
+                next_page = _prefetch.submit(
+                    _call_upstream, path, token, params, namespace
+                )
+
+            yield json_data
+
+            if prefetch:
+                json_data = next_page.result()
             else:
+                json_data = _call_upstream(path, token, params, namespace)
+
+    def _sync_contacts(
+        self,
+        token,
+        page_size=None,
+        person_fields=FULL_PERSON_FIELDS,
+        owner=None,
+    ):
+        """Bring the user snapshot up to date with the People API.
+
+        The first call downloads the whole address book. The next ones send
+        the stored sync token and only apply the returned changes. When the
+        sync token is expired (410), the snapshot is dropped and a full
+        download is made again.
+
+        Parameters
+        ----------
+        token : str
+            OAuth2 access token given by google.
+        page_size : int
+            Connections per page.
+        person_fields : str
+            personFields mask, each mask has its own snapshot.
+        owner : str
+            Owner of the token, resolved when not given, see
+            ``_token_owner``.
+
+        Returns
+        -------
+        Snapshot
+            Updated snapshot, or an api error dict.
+        int
+            Response code
+
+        """
+        if owner is None:
+            owner = _token_owner(token)
+        key = snapshot_key(owner, person_fields)
+        snapshot = snapshots.get(key)
+        sync_token = snapshot.sync_token if snapshot is not None else None
+
+        contacts = {}
+        removed_ids = []
+        next_sync_token = None
+
+        try:
+            for json_data in self._iter_connections_pages(
+                token, page_size, sync_token, person_fields
+            ):
+                if json_data.get("error", None) is not None:
+                    if json_data["error"]["code"] == 401:
+                        return INVALID_CREDENTIALS
+                    elif (
+                        json_data["error"]["code"] == 410
+                        and sync_token is not None
+                    ):
+                        # Sync token expirado, refaz o download completo
+                        snapshots.drop(key)
+                        return self._sync_contacts(
+                            token, page_size, person_fields, owner
+                        )
+                    else:
+                        # Outros tipos de erros
+                        return json_data, 462
+
+                connections = json_data.get("connections", [])
+                if sync_token is not None:
+                    # Alterados e removidos saem do snapshot, os alterados
+                    # voltam abaixo com os dados novos
+                    removed_ids.extend(
+                        c["resourceName"].split("/")[1] for c in connections
+                    )
+                    connections = [
+                        c
+                        for c in connections
+                        if not c.get("metadata", {}).get("deleted", False)
+                    ]
+
                 # Processar os dados e transformar em algo simples p/ front
+                with timed("parse"):
+                    page = ContactData.multiples_json_contacts_to_objects(
+                        {"connections": connections}
+                    )
+                for contact in page["contacts"]:
+                    contacts[contact["id"]] = contact
 
-                objects = Contact.multiples_json_contacts_to_objects(json_data)
+                next_sync_token = json_data.get(
+                    "nextSyncToken", next_sync_token
+                )
+        except requests.exceptions.RequestException:
+            return UPSTREAM_UNAVAILABLE
 
-                if grouped:
-                    grouped_by_domains = Contact.group_by_email_group(objects)
-                    sorted(
-                        grouped_by_domains,
-                        key=lambda k: len(grouped_by_domains[k]),
-                        reverse=False,
+        if snapshot is None:
+            snapshot = Snapshot(next_sync_token, contacts)
+        else:
+            snapshot = snapshot.apply_delta(
+                removed_ids, contacts.values(), next_sync_token
+            )
+
+        if next_sync_token is not None:
+            snapshots.put(key, snapshot)
+
+        return snapshot, 200
+
+    def _get_list_of_contacts(
+        self, grouped=True, page_size=None, token=None, fields=None
+    ):
+        """Get the normalized contacts of the user.
+
+        Parameters
+        ----------
+        grouped : bool
+            Group the contacts by domain.
+        page_size : int
+            Connections per People API page.
+        token : str
+            OAuth2 access token, from the headers when not given.
+        fields : Iterable[str]
+            Contact fields the caller consumes, all of them when None. The
+            other fields get the defaults of a contact without them. When
+            the contacts with every field are cached, or have a snapshot to
+            sync, they are projected. Only otherwise just the personFields
+            filling fields are requested.
+
+        Returns
+        -------
+        dict
+            {"contacts": [contact1, ...]}, or grouped by domain.
+        int
+            Response Code
+
+        """
+        if token is None:
+            token = request.headers.get("authorization-code")
+        if token is not None:
+            person_fields = person_fields_mask(fields)
+            owner = _token_owner(token)
+            cache_key = snapshot_key(owner, person_fields)
+            objects = contact_cache.get(cache_key)
+
+            if objects is None and person_fields != FULL_PERSON_FIELDS:
+                # Os contatos completos servem qualquer mascara menor
+                full_key = snapshot_key(owner, FULL_PERSON_FIELDS)
+                full = contact_cache.get(full_key)
+                if full is None and snapshots.get(full_key) is not None:
+                    snapshot = self._sync_contacts(
+                        token, page_size, FULL_PERSON_FIELDS, owner
                     )
-                    return (grouped_by_domains, 200)
-                else:
-                    print(objects)
-                    return (objects, 200)
+                    if snapshot[1] != 200:
+                        return snapshot
+                    full = snapshot[0].to_list()
+                    contact_cache.set(full_key, full)
+                if full is not None:
+                    objects = _narrow(full, person_fields)
+                    contact_cache.set(cache_key, objects)
+
+            if objects is None:
+                snapshot = self._sync_contacts(
+                    token, page_size, person_fields, owner
+                )
+                if snapshot[1] != 200:
+                    return snapshot
+
+                objects = snapshot[0].to_list()
+                contact_cache.set(cache_key, objects)
+
+            CONTACTS_PER_REQUEST.observe(
+                len(objects["contacts"]), namespace=current_namespace()
+            )
+
+            if grouped:
+                return (ContactData.group_by_email_group(objects), 200)
+            else:
+                return (objects, 200)
 
         else:
             return NO_AUTH_CODE
 
+    def _get_contacts_page(
+        self, grouped, limit=None, cursor=None, fields=None, group_by="domain"
+    ):
+        """Get the list of contacts, paginated and with only some fields.
+
+        Pages are ordered by group and id when grouped, and by id otherwise.
+        The cursor holds the key of the last contact returned, so contacts
+        added or removed between two pages do not shift the next ones.
+
+        Parameters
+        ----------
+        grouped : bool
+            Group the page, like ``_get_list_of_contacts``.
+        limit : int
+            Contacts per page. Without limit and cursor every contact is
+            returned, in the ``_get_list_of_contacts`` order.
+        cursor : str
+            ``next_cursor`` of the previous page.
+        fields : List[str]
+            Fields of each contact, id is always included.
+        group_by : str
+            One of ``GROUP_BY_DIMENSIONS``.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure, next_cursor only when
+            paginating:
+            {
+                "contacts": {"group1": [contact1, ...]} or [contact1, ...],
+                "next_cursor": "..." or None
+            }
+        int
+            Response Code
+
+        """
+        if fields is not None:
+            fields = _select_fields(fields)
+            if fields is None:
+                return INVALID_FIELDS
+
+        dimension = GROUP_BY_DIMENSIONS[group_by]
+        getter = ContactStatistics.DIMENSIONS[dimension]
+
+        if grouped:
+
+            def key(contact):
+                return (getter(contact), contact["id"])
+
+        else:
+
+            def key(contact):
+                return (contact["id"],)
+
+        after = None
+        if cursor is not None:
+            after = _decode_cursor(cursor, 2 if grouped else 1)
+            if after is None:
+                return INVALID_CURSOR
+
+        objects = self._get_list_of_contacts(
+            grouped=False,
+            fields=_fetch_fields(fields, dimension) if grouped else fields,
+        )
+        if objects[1] != 200:
+            return objects
+        contacts = objects[0]["contacts"]
+
+        paginate = limit is not None or after is not None
+        next_cursor = None
+        if paginate:
+            if limit is None:
+                limit = DEFAULT_LIMIT
+            limit = max(1, min(limit, MAX_LIMIT))
+
+            if after is not None:
+                contacts = (c for c in contacts if key(c) > after)
+            # Uma passada com heap, sem ordenar a agenda inteira por pagina
+            contacts = heapq.nsmallest(limit + 1, contacts, key=key)
+
+            if len(contacts) > limit:
+                contacts = contacts[:limit]
+                next_cursor = _encode_cursor(key(contacts[-1]))
+
+        if grouped:
+            groups = ContactData.group_by(contacts, getter)
+            result = {
+                "contacts": {
+                    value: _project(page, fields)
+                    for value, page in groups.items()
+                }
+            }
+        else:
+            result = {"contacts": _project(contacts, fields)}
+
+        if paginate:
+            result["next_cursor"] = next_cursor
+        return result, 200
+
+    def _get_contact_groups(
+        self, group_by="domain", sort="size", top=None, fields=None
+    ):
+        """Get the contacts grouped by any dimension, as an ordered list.
+
+        The contacts are grouped in a single pass, and with top only the
+        selected groups are sorted and serialized, so an address book with
+        thousands of groups is cheap to rank.
+
+        Parameters
+        ----------
+        group_by : str
+            One of ``GROUP_BY_DIMENSIONS``.
+        sort : str
+            See ``ContactData.rank_groups``.
+        top : int
+            Number of groups returned, all of them when None.
+        fields : List[str]
+            Fields of each contact, id is always included.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                "groups": [
+                    {"value": "group1", "size": 2, "contacts": [...]},
+                    {"value": "group2", "size": 1, "contacts": [...]}
+                ],
+                "total_groups": 2
+            }
+        int
+            Response Code
+
+        """
+        if fields is not None:
+            fields = _select_fields(fields)
+            if fields is None:
+                return INVALID_FIELDS
+
+        dimension = GROUP_BY_DIMENSIONS[group_by]
+
+        objects = self._get_list_of_contacts(
+            grouped=False, fields=_fetch_fields(fields, dimension)
+        )
+        if objects[1] != 200:
+            return objects
+
+        with timed("aggregate"):
+            groups = ContactData.group_by(
+                objects[0]["contacts"], ContactStatistics.DIMENSIONS[dimension]
+            )
+            ranked = ContactData.rank_groups(groups, sort, top)
+
+        return (
+            {
+                "groups": [
+                    {
+                        "value": value,
+                        "size": len(page),
+                        "contacts": _project(page, fields),
+                    }
+                    for value, page in ranked
+                ],
+                "total_groups": len(groups),
+            },
+            200,
+        )
+
     def get(self):
         """Get methods that returns an contact specific information or a list with grouped contat"""
 
         args = parser.parse_args()
 
-        if args["personId"] is None:
-            return self._get_list_of_contacts()
+        if args["personIds"] is not None:
+            person_ids = list(
+                dict.fromkeys(i for i in args["personIds"].split(",") if i)
+            )
+            if len(person_ids) > MAX_PERSON_IDS:
+                return TOO_MANY_PERSON_IDS
+            return self._get_batch_contacts(person_ids)
+        elif args["personId"] is None:
+            grouped = args["grouped"] != "false"
+            group_by = args["groupBy"] or "domain"
+            fields = args["fields"]
+            if fields is not None:
+                fields = [f for f in fields.split(",") if f]
+
+            if group_by not in GROUP_BY_DIMENSIONS:
+                return INVALID_GROUPING
+
+            if args["sort"] is not None or args["top"] is not None:
+                if (
+                    not grouped
+                    or args["sort"] not in GROUP_SORTS + (None,)
+                    or (args["top"] is not None and args["top"] < 1)
+                    or args["limit"] is not None
+                    or args["cursor"] is not None
+                ):
+                    return INVALID_GROUPING
+                return self._get_contact_groups(
+                    group_by, args["sort"] or "size", args["top"], fields
+                )
+
+            if grouped and all(
+                args[arg] is None
+                for arg in ("limit", "cursor", "fields", "groupBy")
+            ):
+                return self._get_list_of_contacts()
+
+            return self._get_contacts_page(
+                grouped, args["limit"], args["cursor"], fields, group_by
+            )
         else:
             aux = self._get_specific_contact(args["personId"])
             return aux
+
+
+search_parser = reqparse.RequestParser()
+search_parser.add_argument("q", type=str, location="args")
+search_parser.add_argument("limit", type=int, location="args")
+search_parser.add_argument("fields", type=str, location="args")
+for _field in FILTER_FIELDS:
+    search_parser.add_argument(_field, type=str, location="args")
+
+
+@contact_namespace.header(
+    "authorization-code",
+    "OAuth2 Access Token given by google api.",
+    required=True,
+)
+@contact_namespace.doc(
+    responses={
+        200: "OK",
+        461: "Invalid Token",
+        460: "No authorization-code in headers",
+        462: "Another errors",
+        466: "Google People API unavailable",
+        469: "Unknown field in fields",
+        471: "Missing q and filters",
+    },
+    params={
+        "q": """Words to search, each one must start a word of the name, the email or its domain. Case insensitive""",
+        "organization": """Only contacts of this organization""",
+        "city": """Only contacts of this city""",
+        "region": """Only contacts of this region""",
+        "limit": """Maximum contacts returned (up to 1000), the best ranked ones. Defaults to 100""",
+        "fields": """Comma separated contact fields to return, like fields=name,email. id is always returned""",
+    },
+)
+@contact_namespace.route("/search")
+class ContactSearchApi(Resource):
+    """Restful API to search the contacts of the user."""
+
+    def get(self):
+        """Search the contacts by name and email prefixes and exact filters.
+
+        The contacts come from the same snapshot of GET /contact, and its
+        search index is kept in memory and updated with the snapshot
+        changes.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure, best matches first:
+            {"contacts": [contact1, contact2, ...], "total": 2}
+        int
+            Response Code
+        """
+        token = request.headers.get("authorization-code")
+        if token is None:
+            return NO_AUTH_CODE
+
+        args = search_parser.parse_args()
+        query = args["q"] or ""
+        filters = {
+            field: args[field]
+            for field in FILTER_FIELDS
+            if args[field] is not None
+        }
+        if not query.strip() and not filters:
+            return INVALID_SEARCH
+
+        fields = args["fields"]
+        if fields is not None:
+            fields = _select_fields([f for f in fields.split(",") if f])
+            if fields is None:
+                return INVALID_FIELDS
+
+        limit = args["limit"]
+        if limit is None:
+            limit = DEFAULT_LIMIT
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        objects = ContactApi()._get_list_of_contacts(
+            grouped=False, token=token
+        )
+        if objects[1] != 200:
+            return objects
+
+        key = snapshot_key(_token_owner(token), FULL_PERSON_FIELDS)
+        snapshot = snapshots.get(key)
+        if snapshot is not None:
+            contacts = snapshot.contacts
+        else:
+            contacts = {c["id"]: c for c in objects[0]["contacts"]}
+
+        with timed("search_index"):
+            index = get_index(key, contacts)
+        with timed("search"):
+            found, total = index.search(query, filters, limit)
+
+        return {"contacts": _project(found, fields), "total": total}, 200
+
+
+@contact_namespace.doc(responses={200: "OK"})
+@contact_namespace.route("/cache")
+class ContactCacheApi(Resource):
+    """Restful API to inspect the normalized contacts cache."""
+
+    def get(self):
+        """Get the hit/miss counters of the contacts cache."""
+        return contact_cache.stats(), 200
@@ -0,0 +1,195 @@
+"""Module with a bounded pool of background jobs."""
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFull(Exception):
+    """Raised when a pool has no room for another job."""
+
+
+class Job:
+    """A unit of work run by a ``JobPool``.
+
+    Attributes
+    ----------
+    id : str
+        Unique job id.
+    key : str
+        Deduplication key, jobs with the same key collapse while queued.
+    status : str
+        ``queued``, ``running``, ``done`` or ``failed``.
+    result : object
+        Value returned by the job function.
+    error : str
+        Exception message, when failed.
+    created_at, started_at, finished_at : float
+        Unix timestamps.
+
+    """
+
+    def __init__(self, key=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def pending(self):
+        """Whether the job is queued or running."""
+        return self.status in ("queued", "running")
+
+    def to_dict(self):
+        """Convert the job state to a dictionary, without the result."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobPool:
+    """Run jobs on a bounded number of threads with a bounded queue.
+
+    Jobs submitted with a key that is still queued are not enqueued again,
+    the queued job is returned instead. Once a job starts running, a new
+    submit with its key queues a new job, so late changes are not lost.
+    Jobs with the same key never run at the same time: the new one waits
+    for the running one to finish before it is handed to a thread.
+
+    Attributes
+    ----------
+    max_workers : int
+        Jobs running at the same time.
+    max_queue : int
+        Jobs waiting for a worker, past it ``submit`` raises QueueFull.
+    max_finished : int
+        Finished jobs kept to be queried.
+
+    """
+
+    def __init__(self, max_workers, max_queue, max_finished=1000, name="jobs"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._jobs = OrderedDict()
+        self._queued_keys = {}
+        # Keys with a job handed to the executor, and the next job of each
+        self._scheduled_keys = set()
+        self._waiting = {}
+        self._latest_keys = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, key=None, **kwargs):
+        """Enqueue fn(*args, **kwargs).
+
+        Parameters
+        ----------
+        fn : Callable
+            Job function.
+        key : str
+            Deduplication key.
+
+        Returns
+        -------
+        Job
+            The new job, or the queued one with the same key.
+
+        Raises
+        ------
+        QueueFull
+            When max_workers + max_queue jobs are already pending.
+
+        """
+        with self._lock:
+            if key is not None and key in self._queued_keys:
+                return self._queued_keys[key]
+
+            if self._pending >= self.max_workers + self.max_queue:
+                raise QueueFull()
+
+            job = Job(key)
+            self._pending += 1
+            self._jobs[job.id] = job
+            if key is not None:
+                self._queued_keys[key] = job
+                self._latest_keys[key] = job
+            self._forget_finished()
+
+            if key is not None:
+                if key in self._scheduled_keys:
+                    self._waiting[key] = (job, fn, args, kwargs)
+                    return job
+                self._scheduled_keys.add(key)
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the job with the given id, or None."""
+        with self._lock:
+            return self._jobs.get(job_id, None)
+
+    def latest(self, key):
+        """Return the last job submitted with the given key, or None."""
+        with self._lock:
+            return self._latest_keys.get(key, None)
+
+    def stats(self):
+        """Return how many jobs are pending and kept."""
+        with self._lock:
+            return {
+                "pending": self._pending,
+                "jobs": len(self._jobs),
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+            }
+
+    def _run(self, job, fn, args, kwargs):
+        with self._lock:
+            if self._queued_keys.get(job.key, None) is job:
+                del self._queued_keys[job.key]
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            logging.exception("[job_pool.py] Job %s failed", job.id)
+            job.error = str(e)
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._pending -= 1
+                waiting = self._waiting.pop(job.key, None)
+                if waiting is not None:
+                    self._executor.submit(self._run, *waiting)
+                else:
+                    self._scheduled_keys.discard(job.key)
+
+    def _forget_finished(self):
+        finished = len(self._jobs) - self._pending
+        for job_id in list(self._jobs):
+            if finished <= self.max_finished:
+                break
+            job = self._jobs[job_id]
+            if not job.pending:
+                del self._jobs[job_id]
+                if self._latest_keys.get(job.key, None) is job:
+                    del self._latest_keys[job.key]
+                finished -= 1
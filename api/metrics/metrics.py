@@ -0,0 +1,227 @@
+"""Module with the in-process metrics, exported in Prometheus text format.
+
+Metrics are kept per process, each gunicorn worker exports its own.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import has_request_context, request
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+BYTES_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+COUNT_BUCKETS = (0, 10, 100, 500, 1000, 5000, 10000, 50000, 100000)
+
+
+def _format_labels(labels):
+    return ",".join('{}="{}"'.format(k, v) for k, v in labels)
+
+
+class Counter:
+    """Monotonic counter with labels.
+
+    Attributes
+    ----------
+    name : str
+        Metric name.
+    help : str
+        Metric description.
+
+    """
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        """Increment the counter of the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        """Return the counter in Prometheus text format."""
+        lines = [
+            "# HELP {} {}".format(self.name, self.help),
+            "# TYPE {} counter".format(self.name),
+        ]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(
+                    "{}{{{}}} {}".format(self.name, _format_labels(key), value)
+                )
+        return "\n".join(lines)
+
+
+class Histogram:
+    """Cumulative histogram with labels.
+
+    Attributes
+    ----------
+    name : str
+        Metric name.
+    help : str
+        Metric description.
+    buckets : tuple
+        Upper bounds of the buckets, +Inf is added automatically.
+
+    """
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        """Record a value for the given labels."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * (len(self.buckets) + 1), 0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        """Return the histogram in Prometheus text format."""
+        lines = [
+            "# HELP {} {}".format(self.name, self.help),
+            "# TYPE {} histogram".format(self.name),
+        ]
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, counts):
+                    lines.append(
+                        "{}_bucket{{{}}} {}".format(
+                            self.name,
+                            _format_labels(key + (("le", bound),)),
+                            count,
+                        )
+                    )
+                labels = _format_labels(key)
+                lines.append("{}_sum{{{}}} {}".format(self.name, labels, total))
+                lines.append(
+                    "{}_count{{{}}} {}".format(self.name, labels, counts[-1])
+                )
+        return "\n".join(lines)
+
+
+STAGE_SECONDS = Histogram(
+    "orgcontact_stage_duration_seconds",
+    "Time spent in each stage of a request.",
+)
+UPSTREAM_RESPONSES = Counter(
+    "orgcontact_upstream_responses_total",
+    "People API responses by status code.",
+)
+UPSTREAM_PAYLOAD_BYTES = Histogram(
+    "orgcontact_upstream_payload_bytes",
+    "Size of the People API response bodies.",
+    BYTES_BUCKETS,
+)
+CONTACTS_PER_REQUEST = Histogram(
+    "orgcontact_contacts_per_request",
+    "Normalized contacts handled by a request.",
+    COUNT_BUCKETS,
+)
+RESPONSE_BYTES = Counter(
+    "orgcontact_response_bytes_total",
+    "Size of the compressible api response bodies, before compression.",
+)
+RESPONSE_WIRE_BYTES = Counter(
+    "orgcontact_response_wire_bytes_total",
+    "Size of the compressible api response bodies, as sent.",
+)
+
+REGISTRY = [
+    STAGE_SECONDS,
+    UPSTREAM_RESPONSES,
+    UPSTREAM_PAYLOAD_BYTES,
+    CONTACTS_PER_REQUEST,
+    RESPONSE_BYTES,
+    RESPONSE_WIRE_BYTES,
+]
+
+
+_local = threading.local()
+
+
+@contextmanager
+def namespace(name):
+    """Label the metrics recorded by this thread with a namespace.
+
+    Used by background jobs, which run outside of a request.
+
+    Parameters
+    ----------
+    name : str
+        Namespace name, like ``report``.
+
+    """
+    previous = getattr(_local, "namespace", None)
+    _local.namespace = name
+    try:
+        yield
+    finally:
+        _local.namespace = previous
+
+
+def current_namespace():
+    """Return the api namespace of the request being served.
+
+    Returns
+    -------
+    str
+        ``user``, ``contact``, ``report``, the one set by ``namespace``, or
+        ``background`` outside of a request.
+
+    """
+    name = getattr(_local, "namespace", None)
+    if name is not None:
+        return name
+
+    if not has_request_context():
+        return "background"
+
+    parts = request.path.strip("/").split("/")
+    if len(parts) > 1 and parts[0] == "api":
+        return parts[1]
+    return parts[0] or "root"
+
+
+@contextmanager
+def timed(stage, namespace=None):
+    """Measure the time spent in the with block as a request stage.
+
+    Parameters
+    ----------
+    stage : str
+        Stage name, like ``upstream_fetch`` or ``parse``.
+    namespace : str
+        Defaults to the namespace of the current request.
+
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(
+            time.perf_counter() - start,
+            namespace=namespace or current_namespace(),
+            stage=stage,
+        )
+
+
+def render():
+    """Return every metric in Prometheus text format."""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
@@ -0,0 +1,11 @@
+"""Module for the metrics endpoint."""
+from flask import Response
+
+from api.server import app
+from api.metrics.metrics import render
+
+
+@app.route("/metrics")
+def metrics():
+    """Return the process metrics in Prometheus text format."""
+    return Response(render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,627 @@
+"""Helpers over the normalized contacts, the dicts built from google json.
+
+They do not depend on fireo, so the request paths importing them do not
+load the Firestore client. ``Contact`` is the persisted model.
+"""
+import heapq
+import logging
+import sys
+from datetime import datetime
+
+MISSING = sys.intern("Missing")
+
+# Defaults used when google omits a field, shared by every connection
+_MISSING_NAMES = ({"displayName": "Missin Name"},)
+_MISSING_PHOTOS = ({"url": ""},)
+_MISSING_ORGANIZATIONS = ({"name": MISSING, "title": MISSING},)
+_MISSING_ADDRESSES = ({"city": MISSING, "region": MISSING},)
+
+# Value of each contact field when google omits it
+MISSING_VALUES = {
+    "name": _MISSING_NAMES[0]["displayName"],
+    "photo_url": _MISSING_PHOTOS[0]["url"],
+    "job": MISSING,
+    "organization": MISSING,
+    "region": MISSING,
+    "city": MISSING,
+}
+
+
+def intern_value(value):
+    """Intern a high-repeat string value, leaving other types untouched.
+
+    Parameters
+    ----------
+    value : object
+        Value read from the google json, usually a str.
+
+    Returns
+    -------
+    object
+        The interned string, or the value itself.
+
+    """
+    if type(value) is str:
+        return sys.intern(value)
+    return value
+
+
+class ContactData:
+    """Static helpers to build, group and count normalized contacts.
+
+    A normalized contact is a dict with the keys of ``Contact.to_dict``.
+
+    """
+
+    @staticmethod
+    def multiples_json_contacts_to_objects(json):
+        """Convert the request from google people api into a useful list.
+
+        This methods create a list containing all the contacts got from api,
+        storing only id, name, photo_url and email.
+
+        Parameters
+        ----------
+        json : dict
+            dictionary returned from Google People Api, one page of the
+            connections GET.
+
+        Returns
+        -------
+        dict
+            the contacts as dictionaries, built directly instead of through
+            ``Contact`` since they are not persisted. organization, job,
+            city and region are interned, they repeat a lot:
+            {"contacts": [
+                {"id": "123", "name": "test", "photo_url": "...", ...},
+                {"id": "345", "name": "name", "photo_url": "...", ...}
+            ]}
+
+        """
+        # The last page (or an empty address book) has no connections key
+        connections = json.get("connections", [])
+
+        data = {"contacts": []}
+
+        for connection in connections:
+            try:
+                organization = connection.get(
+                    "organizations", _MISSING_ORGANIZATIONS
+                )[0]
+                address = connection.get("addresses", _MISSING_ADDRESSES)[0]
+                # Mesma ordem de chaves do ContactData.to_dict
+                data["contacts"].append(
+                    {
+                        "id": connection["resourceName"].split("/")[1],
+                        "name": connection.get("names", _MISSING_NAMES)[0][
+                            "displayName"
+                        ],
+                        "photo_url": connection.get(
+                            "photos", _MISSING_PHOTOS
+                        )[0]["url"],
+                        "email": connection["emailAddresses"][0]["value"],
+                        "job": intern_value(organization["title"]),
+                        "organization": intern_value(organization["name"]),
+                        "region": intern_value(address["region"]),
+                        "city": intern_value(address["city"]),
+                    }
+                )
+            except KeyError as e:
+                if "emailAddresses" in str(e):
+                    pass
+                else:
+                    logging.warning(
+                        "[ContactData.py] Exception Error at {}, returning KeyError {}".format(
+                            datetime.now(), str(e)
+                        )
+                    )
+
+        return data
+
+    @staticmethod
+    def _get_domain(data):
+        """Get the domain.
+
+        The domain are the right side after @, in other words:
+        email => "teste@abcde.com" means
+        domain => "@abcde.com"
+
+        Parameters
+        ----------
+        data : Union[Dict, Contact]
+            Contact specific data, given in a dict format ou Contact object
+
+        Returns
+        -------
+        str
+            String containing the domain
+
+        """
+        return data["email"].split("@")[1]
+
+    @staticmethod
+    def get_unique_domains(data):
+        """Get a set of unique domains in a list of contacts.
+
+        Parameters
+        ----------
+        data : List
+            A list with multiples contacts
+
+        Returns
+        -------
+        set
+            A set composed by unique domains found in data
+
+        """
+        domains = set()
+
+        for connection in data:
+            domains.add(ContactData._get_domain(connection))
+
+        return domains
+
+    @staticmethod
+    def _get_organization(data):
+        """Get the organization.
+
+        Parameters
+        ----------
+        data : Union[Dict, Contact]
+            Contact specific data, given in a dict format ou Contact object
+
+        Returns
+        -------
+        str
+            String containing the organization
+
+        """
+        return data.get("organization", "Missing")
+
+    @staticmethod
+    def _get_job(data):
+        """Get the job title.
+
+        Parameters
+        ----------
+        data : Union[Dict, Contact]
+            Contact specific data, given in a dict format ou Contact object
+
+        Returns
+        -------
+        str
+            String containing the job title
+
+        """
+        return data.get("job", "Missing")
+
+    @staticmethod
+    def _get_city(data):
+        """Get the city.
+
+        Parameters
+        ----------
+        data : Union[Dict, Contact]
+            Contact specific data, given in a dict format ou Contact object
+
+        Returns
+        -------
+        str
+            String containing the city
+
+        """
+        return data.get("city", "Missing")
+
+    @staticmethod
+    def _get_region(data):
+        """Get the organization.
+
+        Parameters
+        ----------
+        data : Union[Dict, Contact]
+            Contact specific data, given in a dict format ou Contact object
+
+        Returns
+        -------
+        str
+            String containing the organization
+
+        """
+        return data.get("region", "Missing")
+
+    @staticmethod
+    def get_unique_organizations(data):
+        """Get a set of unique organizations in a list of contacts.
+
+        Parameters
+        ----------
+        data : List
+            A list with multiples contacts
+
+        Returns
+        -------
+        set
+            A set composed by unique organizations found in data
+
+        """
+        domains = set()
+
+        for connection in data:
+            domains.add(ContactData._get_organization(connection))
+
+        return domains
+
+    @staticmethod
+    def get_unique_job(data):
+        """Get a set of unique job in a list of contacts.
+
+        Parameters
+        ----------
+        data : List
+            A list with multiples contacts
+
+        Returns
+        -------
+        set
+            A set composed by unique job found in data
+
+        """
+        domains = set()
+
+        for connection in data:
+            domains.add(ContactData._get_job(connection))
+
+        return domains
+
+    @staticmethod
+    def get_unique_city(data):
+        """Get a set of unique city in a list of contacts.
+
+        Parameters
+        ----------
+        data : List
+            A list with multiples contacts
+
+        Returns
+        -------
+        set
+            A set composed by unique city found in data
+
+        """
+        domains = set()
+
+        for connection in data:
+            domains.add(ContactData._get_city(connection))
+
+        return domains
+
+    @staticmethod
+    def get_unique_region(data):
+        """Get a set of unique region in a list of contacts.
+
+        Parameters
+        ----------
+        data : List
+            A list with multiples contacts
+
+        Returns
+        -------
+        set
+            A set composed by unique region found in data
+
+        """
+        domains = set()
+
+        for connection in data:
+            domains.add(ContactData._get_region(connection))
+
+        return domains
+
+    @staticmethod
+    def group_by(data, getter):
+        """Group a list of contacts by any value of the contacts.
+
+        The groups are built in a single pass, in the order their first
+        contact appears.
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+        getter : Callable[[dict], str]
+            Function returning the group of a contact, like ``_get_domain``
+            or a ``ContactStatistics.DIMENSIONS`` getter.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'value1': [contact1, contact2],
+                'value2': [contact3]
+            }
+
+        """
+        groups = {}
+
+        for connection in data:
+            value = getter(connection)
+            group = groups.get(value, None)
+            if group is None:
+                groups[value] = [connection]
+            else:
+                group.append(connection)
+
+        return groups
+
+    @staticmethod
+    def rank_groups(groups, sort="size", top=None):
+        """Order the groups of ``group_by``.
+
+        Parameters
+        ----------
+        groups : dict
+            Contacts per group value.
+        sort : str
+            ``size`` for the biggest groups first, ties by value, or ``name``
+            for the values in alphabetical order.
+        top : int
+            Only return the first top groups. They are selected with a heap,
+            without sorting all the groups.
+
+        Returns
+        -------
+        List[tuple]
+            (value, contacts) of each group.
+
+        """
+        if sort == "name":
+
+            def key(item):
+                return item[0]
+
+        else:
+
+            def key(item):
+                return (-len(item[1]), item[0])
+
+        if top is None:
+            return sorted(groups.items(), key=key)
+        return heapq.nsmallest(top, groups.items(), key=key)
+
+    @staticmethod
+    def group_by_email_group(data):
+        """Get a grouped by domains list of contacts.
+
+        This methods creates an dictionary with key as unique domain and pass
+        a list of contacts with the same domain.
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'domain1': [contact1, contact2],
+                'domain2': [contact3, contact3]
+            }
+
+        """
+        return {
+            "contacts": ContactData.group_by(data["contacts"], ContactData._get_domain)
+        }
+
+    @staticmethod
+    def get_quantity_per_domain(data):
+        """Get a dict with quantity of contacts per domain
+
+        This methods creates an dictionary with key as unique domain and pass
+        a integer number representing how much contacts has this domain
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'domain1': 3,
+                'domain2': 1
+            }
+
+        """
+        data = data["contacts"]
+
+        domains = ContactData.get_unique_domains(data)
+
+        domains_grouped = {}
+
+        for domain in domains:
+            domains_grouped[domain] = 0
+
+        for connection in data:
+            domains_grouped[ContactData._get_domain(connection)] += 1
+
+        return {"contacts": domains_grouped}
+
+    @staticmethod
+    def _get_specific_contact_informations(data):
+        """Return specific information about a contact.
+        
+        Parameters
+        ----------
+        data : dict
+            Dictionary returned from google people api request
+            
+        Returns
+        -------
+        dict
+            Dictionary with only desired informations.
+            {
+                "address": address,
+                "birth_date": birth_date,
+                "organization": organization,
+                "occupation": occupation,
+            }
+
+        """
+        address = data.get("addresses", [{"streetAddress": "Missing"}])[0].get(
+            "streetAddress"
+        )
+        birth_date = data.get("birthdays", [{"text": "Missing"}])[0].get(
+            "text"
+        )
+        organization = data.get("organizations", [{"name": "Missing"}])[0].get(
+            "name"
+        )
+        occupation = data.get("organizations", [{"title": "Missing"}])[0].get(
+            "title"
+        )
+
+        return {
+            "address": address,
+            "birth_date": birth_date,
+            "organization": organization,
+            "occupation": occupation,
+        }
+
+    @staticmethod
+    def get_quantity_per_organization(data):
+        """Get a dict with quantity of contacts per organization
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'organization1': 3,
+                'organization2': 1
+            }
+
+        """
+        data = data["contacts"]
+
+        organizations = ContactData.get_unique_organizations(data)
+
+        organizations_grouped = {}
+
+        for org in organizations:
+            organizations_grouped[org] = 0
+
+        for connection in data:
+            organizations_grouped[ContactData._get_organization(connection)] += 1
+
+        return {"contacts": organizations_grouped}
+
+    @staticmethod
+    def get_quantity_per_job(data):
+        """Get a dict with quantity of contacts per job
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'job_title1': 3,
+                'job_title2': 1
+            }
+
+        """
+        data = data["contacts"]
+
+        jobs = ContactData.get_unique_job(data)
+
+        jobs_grouped = {}
+
+        for job in jobs:
+            jobs_grouped[job] = 0
+
+        for connection in data:
+            jobs_grouped[ContactData._get_job(connection)] += 1
+
+        return {"contacts": jobs_grouped}
+
+    @staticmethod
+    def get_quantity_per_city(data):
+        """Get a dict with quantity of contacts per city
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'city1': 3,
+                'city2': 1
+            }
+
+        """
+        data = data["contacts"]
+
+        citys = ContactData.get_unique_city(data)
+
+        city_grouped = {}
+
+        for city in citys:
+            city_grouped[city] = 0
+
+        for connection in data:
+            city_grouped[ContactData._get_city(connection)] += 1
+
+        return {"contacts": city_grouped}
+
+    @staticmethod
+    def get_quantity_per_region(data):
+        """Get a dict with quantity of contacts per region
+
+        Parameters
+        ----------
+        data : List
+            List of contacts
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure:
+            {
+                'region1': 3,
+                'region2': 1
+            }
+
+        """
+        data = data["contacts"]
+
+        regions = ContactData.get_unique_region(data)
+
+        region_grouped = {}
+
+        for region in regions:
+            region_grouped[region] = 0
+
+        for connection in data:
+            region_grouped[ContactData._get_region(connection)] += 1
+
+        return {"contacts": region_grouped}
+
+
@@ -0,0 +1,301 @@
+"""Contact statistics, counting contacts per dimension in a single pass."""
+from collections import OrderedDict
+
+from api.models.ContactData import ContactData
+
+
+class ContactStatistics:
+    """Count contacts per any set of dimensions.
+
+    A dimension is a name and a function that extracts its value from a
+    normalized contact. New dimensions are added with
+    ``register_dimension``, without new methods in ``ContactData``.
+
+    Attributes
+    ----------
+    DIMENSIONS : OrderedDict
+        Registered dimensions, name to getter.
+    DIMENSION_FIELDS : dict
+        Contact fields read by each dimension getter, None when unknown.
+    USER_DIMENSIONS : tuple
+        Dimensions stored in ``User.contacts_statistics``.
+
+    """
+
+    DIMENSIONS = OrderedDict(
+        [
+            ("domain", ContactData._get_domain),
+            ("organization", ContactData._get_organization),
+            ("jobtitle", ContactData._get_job),
+            ("city", ContactData._get_city),
+            ("region", ContactData._get_region),
+        ]
+    )
+
+    DIMENSION_FIELDS = {
+        "domain": ("email",),
+        "organization": ("organization",),
+        "jobtitle": ("job",),
+        "city": ("city",),
+        "region": ("region",),
+    }
+
+    USER_DIMENSIONS = ("domain", "organization", "jobtitle", "city", "region")
+
+    @staticmethod
+    def register_dimension(name, getter, fields=None):
+        """Register a new dimension.
+
+        Parameters
+        ----------
+        name : str
+            Dimension name, used as key in the results.
+        getter : Callable[[dict], str]
+            Function returning the dimension value of a contact.
+        fields : Iterable[str]
+            Contact fields read by getter. When None, every field is
+            fetched for the statistics using this dimension.
+
+        """
+        ContactStatistics.DIMENSIONS[name] = getter
+        ContactStatistics.DIMENSION_FIELDS[name] = (
+            None if fields is None else tuple(fields)
+        )
+
+    @staticmethod
+    def required_fields(dimensions=None):
+        """Get the contact fields needed to count some dimensions.
+
+        Parameters
+        ----------
+        dimensions : Iterable[str]
+            Dimension names, all registered dimensions when None.
+
+        Returns
+        -------
+        tuple
+            The contact fields, or None when a dimension did not declare
+            its fields and all of them are needed.
+
+        """
+        if dimensions is None:
+            dimensions = ContactStatistics.DIMENSIONS.keys()
+
+        fields = []
+        for name in dimensions:
+            declared = ContactStatistics.DIMENSION_FIELDS.get(name, None)
+            if declared is None:
+                return None
+            fields.extend(f for f in declared if f not in fields)
+        return tuple(fields)
+
+    @staticmethod
+    def count(data, dimensions=None):
+        """Get the quantity of contacts per value of each dimension.
+
+        All the dimensions are counted in the same pass over the contacts.
+
+        Parameters
+        ----------
+        data : dict
+            Normalized contacts, {"contacts": [contact1, contact2, ...]}
+        dimensions : Iterable[str]
+            Dimension names, defaults to every registered dimension.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure, the same returned by
+            ``ContactData.get_quantity_per_*`` for each dimension:
+            {
+                'domain': {'contacts': {'domain1': 3, 'domain2': 1}},
+                'city': {'contacts': {'city1': 2, 'city2': 2}}
+            }
+
+        Raises
+        ------
+        KeyError
+            When a dimension is not registered.
+
+        """
+        if dimensions is None:
+            dimensions = ContactStatistics.DIMENSIONS.keys()
+
+        counters = [
+            (name, ContactStatistics.DIMENSIONS[name], {})
+            for name in dimensions
+        ]
+
+        for connection in data["contacts"]:
+            for _, getter, counts in counters:
+                value = getter(connection)
+                counts[value] = counts.get(value, 0) + 1
+
+        return {name: {"contacts": counts} for name, _, counts in counters}
+
+    @staticmethod
+    def diff(previous, current):
+        """Get the contacts removed and added between two contact sets.
+
+        A changed contact is listed as removed, with its old data, and as
+        added, with the new one.
+
+        Parameters
+        ----------
+        previous : dict
+            Old contacts, keyed by id.
+        current : dict
+            New contacts, keyed by id.
+
+        Returns
+        -------
+        List
+            Removed contacts.
+        List
+            Added contacts.
+
+        """
+        removed = []
+        added = []
+
+        for contact_id, contact in previous.items():
+            new_contact = current.get(contact_id, None)
+            if new_contact is None:
+                removed.append(contact)
+            elif new_contact is not contact and new_contact != contact:
+                removed.append(contact)
+                added.append(new_contact)
+
+        for contact_id, contact in current.items():
+            if contact_id not in previous:
+                added.append(contact)
+
+        return removed, added
+
+    @staticmethod
+    def apply_delta(statistics, removed, added, dimensions=None):
+        """Update counters in place with removed and added contacts.
+
+        Only the counters of the values found in the delta are touched, and
+        the ones that reach zero are dropped. Counters whose value ends the
+        same are not reported as changed.
+
+        Parameters
+        ----------
+        statistics : dict
+            Counters to update, {'domain': {'domain1': 3}, ...}
+        removed : List[dict]
+            Contacts to discount.
+        added : List[dict]
+            Contacts to count.
+        dimensions : Iterable[str]
+            Defaults to the dimensions already in statistics.
+
+        Returns
+        -------
+        dict
+            The changed counters, with None for the dropped ones:
+            {'domain': {'domain1': 4, 'domain2': None}}
+
+        """
+        if dimensions is None:
+            dimensions = list(statistics.keys())
+
+        changed = {}
+
+        for name in dimensions:
+            getter = ContactStatistics.DIMENSIONS[name]
+            counts = statistics.setdefault(name, {})
+            # Counter values before the delta, to skip the unchanged ones
+            touched = {}
+
+            for connection in removed:
+                value = getter(connection)
+                touched.setdefault(value, counts.get(value, 0))
+                counts[value] = counts.get(value, 0) - 1
+
+            for connection in added:
+                value = getter(connection)
+                touched.setdefault(value, counts.get(value, 0))
+                counts[value] = counts.get(value, 0) + 1
+
+            for value, before in touched.items():
+                if counts[value] == before:
+                    if before <= 0:
+                        del counts[value]
+                    continue
+                if counts[value] <= 0:
+                    del counts[value]
+                    changed.setdefault(name, {})[value] = None
+                else:
+                    changed.setdefault(name, {})[value] = counts[value]
+
+        return changed
+
+    @staticmethod
+    def changes(previous, statistics):
+        """Get the counters that differ between two sets of statistics.
+
+        Parameters
+        ----------
+        previous : dict
+            Old counters, {'domain': {'domain1': 3}, ...}
+        statistics : dict
+            New counters.
+
+        Returns
+        -------
+        dict
+            The changed counters, with None for the dropped ones, in the
+            format of ``apply_delta``.
+
+        """
+        changed = {}
+
+        for name in set(previous) | set(statistics):
+            old = previous.get(name) or {}
+            new = statistics.get(name) or {}
+            for value in set(old) | set(new):
+                count = new.get(value, None)
+                if old.get(value, None) != count:
+                    changed.setdefault(name, {})[value] = count
+
+        return changed
+
+    @staticmethod
+    def verify(statistics, data, dimensions=None):
+        """Compare counters with a full recount of the contacts.
+
+        Parameters
+        ----------
+        statistics : dict
+            Counters to check, {'domain': {'domain1': 3}, ...}
+        data : dict
+            Normalized contacts, {"contacts": [contact1, contact2, ...]}
+        dimensions : Iterable[str]
+            Defaults to the dimensions in statistics.
+
+        Returns
+        -------
+        dict
+            Mismatched counters, {'domain': {'domain1': (stored, expected)}},
+            empty when consistent.
+
+        """
+        if dimensions is None:
+            dimensions = list(statistics.keys())
+
+        expected = ContactStatistics.count(data, dimensions)
+        mismatches = {}
+
+        for name in dimensions:
+            counts = statistics.get(name, {})
+            recount = expected[name]["contacts"]
+            for value in set(counts) | set(recount):
+                if counts.get(value, 0) != recount.get(value, 0):
+                    mismatches.setdefault(name, {})[value] = (
+                        counts.get(value, 0),
+                        recount.get(value, 0),
+                    )
+
+        return mismatches
@@ -15,6 +15,9 @@ class User(Model):
     contacts_statistics : dict
         dictionary containg the statistics about contacts, in other words,
         contacts per domain, contacts per City Adresss, contacts per organization
+    contacts_chart : dict
+        contacts_statistics in the chart format, computed when the statistics
+        are saved. See ``statistics_to_chart``.
 
     """
 
@@ -22,6 +25,7 @@ class User(Model):
     query_id = TextField()
     name = TextField()
     contacts_statistics = MapField()
+    contacts_chart = MapField()
     
     
     @staticmethod
@@ -55,7 +59,6 @@ class User(Model):
         chart_data = {}
 
         for key, item in data.items():
-            print(key, item)
             chart_data[key] = {"label": [], "data": []}
 
             for label, value in item.items():
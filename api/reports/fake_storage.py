@@ -0,0 +1,151 @@
+"""Module with a local stand-in of the firebase Storage bucket.
+
+Install it with ``report_writer.set_bucket(FakeBucket())``.
+"""
+import io
+from datetime import datetime, timezone
+
+
+class _FakeBlobWriter(io.RawIOBase):
+    """Writable stream recording each uploaded chunk, like ``BlobWriter``."""
+
+    def __init__(self, blob, chunk_size):
+        self.blob = blob
+        self.chunk_size = chunk_size
+        self._pending = bytearray()
+        self._data = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._pending.extend(data)
+        while len(self._pending) >= self.chunk_size:
+            self._flush_chunk(self.chunk_size)
+        return len(data)
+
+    def _flush_chunk(self, size):
+        chunk = bytes(self._pending[:size])
+        del self._pending[:size]
+        self.blob.chunks.append(len(chunk))
+        self._data.extend(chunk)
+
+    def close(self):
+        if not self.closed:
+            if self._pending:
+                self._flush_chunk(len(self._pending))
+            self.blob._finish(bytes(self._data))
+        super().close()
+
+
+class FakeBlob:
+    """In-memory blob with the calls made by the report api.
+
+    Attributes
+    ----------
+    name : str
+        Blob name.
+    data : bytes
+        Uploaded content, None before the upload ends.
+    chunks : List[int]
+        Size of each chunk received by ``open`` streams.
+    public : bool
+        Whether ``make_public`` was called.
+    metadata : dict
+        Custom metadata, saved by ``patch``.
+    metageneration : int
+        Incremented by each ``patch``.
+
+    """
+
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.data = None
+        self.content_type = None
+        self.chunks = []
+        self.public = False
+        self.time_created = None
+        self.metadata = None
+        self.metageneration = None
+
+    @property
+    def public_url(self):
+        """Url the report would be downloaded from."""
+        return "https://storage.fake/{}/{}".format(self.bucket.name, self.name)
+
+    def open(self, mode="wb", chunk_size=256 * 1024, content_type=None):
+        """Open a chunked upload stream, like ``Blob.open``."""
+        self.content_type = content_type
+        return _FakeBlobWriter(self, chunk_size)
+
+    def upload_from_file(self, file_obj, content_type=None):
+        """Upload the whole content of file_obj."""
+        self.content_type = content_type
+        self._finish(file_obj.read())
+
+    @property
+    def size(self):
+        """Size of the uploaded content."""
+        return None if self.data is None else len(self.data)
+
+    def _finish(self, data):
+        self.data = data
+        self.time_created = datetime.now(timezone.utc)
+        self.metageneration = 1
+        self.bucket._blobs[self.name] = self
+
+    def patch(self):
+        """Save the metadata, like ``Blob.patch``."""
+        self.metageneration += 1
+
+    def delete(self, if_metageneration_match=None):
+        """Remove the blob from the bucket.
+
+        Raises
+        ------
+        google.api_core.exceptions.PreconditionFailed
+            When if_metageneration_match is not the current metageneration.
+
+        """
+        if (
+            if_metageneration_match is not None
+            and if_metageneration_match != self.metageneration
+        ):
+            from google.api_core.exceptions import PreconditionFailed
+
+            raise PreconditionFailed("Metageneration does not match")
+        self.bucket._blobs.pop(self.name, None)
+
+    def make_public(self):
+        """Flag the blob as public."""
+        self.public = True
+
+
+class FakeBucket:
+    """In-memory bucket.
+
+    Attributes
+    ----------
+    name : str
+        Bucket name, used in the public urls.
+
+    """
+
+    def __init__(self, name="fake-bucket"):
+        self.name = name
+        self._blobs = {}
+
+    def blob(self, name):
+        """Return the blob named name, uploaded or not."""
+        return self._blobs.get(name, None) or FakeBlob(self, name)
+
+    def get_blob(self, name):
+        """Return the uploaded blob named name, or None."""
+        return self._blobs.get(name, None)
+
+    def list_blobs(self, prefix=""):
+        """Return the uploaded blobs whose name starts with prefix."""
+        return [
+            blob for name, blob in self._blobs.items() if name.startswith(prefix)
+        ]
@@ -0,0 +1,154 @@
+"""Module to store reports under a key derived from their content.
+
+Two requests with the same contacts and format produce the same key, so the
+second one reuses the uploaded blob instead of writing it again. The age of
+a report counts from its last use, kept in the ``served_at`` metadata.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+REPORT_PREFIX = "reports/"
+REPORT_MAX_AGE = int(os.getenv("REPORT_MAX_AGE", 7 * 24 * 3600))
+REPORT_MAX_TOTAL_BYTES = int(os.getenv("REPORT_MAX_TOTAL_BYTES", 1 << 30))
+REPORT_PRUNE_INTERVAL = int(os.getenv("REPORT_PRUNE_INTERVAL", 600))
+
+# Blob metadata with the last time a report was served
+SERVED_AT = "served_at"
+
+_last_prune = 0
+_prune_lock = threading.Lock()
+
+
+def report_key(contacts, columns, report_format):
+    """Return the content key of a report.
+
+    Parameters
+    ----------
+    contacts : List[dict]
+        Normalized contacts in the report.
+    columns : List[str]
+        Contact fields written in the report, in order.
+    report_format : str
+        Report format, like ``xls``.
+
+    Returns
+    -------
+    str
+        Hex digest of the format, the columns and the contact values.
+
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([report_format, columns]).encode("utf-8"))
+
+    for contact in sorted(contacts, key=lambda c: c["id"]):
+        row = [contact["id"]] + [contact.get(column) for column in columns]
+        digest.update(json.dumps(row).encode("utf-8"))
+
+    return digest.hexdigest()
+
+
+def report_blob_name(key, extension):
+    """Return the blob name of a report key."""
+    return "{}{}.{}".format(REPORT_PREFIX, key, extension)
+
+
+def _age(blob, now):
+    served_at = (blob.metadata or {}).get(SERVED_AT, None)
+    if served_at is not None:
+        return (now - datetime.fromisoformat(served_at)).total_seconds()
+    if blob.time_created is None:
+        return 0
+    return (now - blob.time_created).total_seconds()
+
+
+def find_report(bucket, name):
+    """Return the stored report blob, or None if missing or expired.
+
+    Serving a report refreshes its age, at most once per
+    ``REPORT_PRUNE_INTERVAL``, so it is not pruned while it is still used.
+    The refresh bumps the blob metageneration, which makes a prune that
+    listed the blob before it skip the delete.
+
+    Parameters
+    ----------
+    bucket : google.cloud.storage.Bucket
+        Report bucket.
+    name : str
+        Blob name, from ``report_blob_name``.
+
+    Returns
+    -------
+    google.cloud.storage.Blob
+        The report blob, if it can still be served.
+
+    """
+    blob = bucket.get_blob(name)
+    if blob is None:
+        return None
+
+    now = datetime.now(timezone.utc)
+    age = _age(blob, now)
+    if age >= REPORT_MAX_AGE:
+        return None
+
+    if age >= REPORT_PRUNE_INTERVAL:
+        metadata = dict(blob.metadata or {})
+        metadata[SERVED_AT] = now.isoformat()
+        blob.metadata = metadata
+        blob.patch()
+    return blob
+
+
+def prune_reports(bucket, force=False):
+    """Delete reports past the max age, then the oldest past the size budget.
+
+    A report served after the listing has a new metageneration and is not
+    deleted, see ``find_report``.
+
+    The bucket listing runs at most once per ``REPORT_PRUNE_INTERVAL``
+    seconds in each process, unless force is given.
+
+    Parameters
+    ----------
+    bucket : google.cloud.storage.Bucket
+        Report bucket.
+    force : bool
+        Ignore the prune interval.
+
+    Returns
+    -------
+    int
+        Number of deleted reports.
+
+    """
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+
+    global _last_prune
+
+    with _prune_lock:
+        if not force and time.monotonic() - _last_prune < REPORT_PRUNE_INTERVAL:
+            return 0
+        _last_prune = time.monotonic()
+
+    now = datetime.now(timezone.utc)
+    blobs = sorted(
+        bucket.list_blobs(prefix=REPORT_PREFIX),
+        key=lambda blob: _age(blob, now),
+    )
+
+    deleted = 0
+    total = 0
+    for blob in blobs:
+        total += blob.size or 0
+        if _age(blob, now) >= REPORT_MAX_AGE or total > REPORT_MAX_TOTAL_BYTES:
+            try:
+                blob.delete(if_metageneration_match=blob.metageneration)
+            except (NotFound, PreconditionFailed):
+                continue
+            deleted += 1
+
+    return deleted
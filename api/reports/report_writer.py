@@ -0,0 +1,347 @@
+"""Module to write reports straight into a Storage upload, without /tmp."""
+import csv
+import importlib.util
+import io
+import os
+import tempfile
+
+from api.startup.firebase_app import get_app
+
+# Report columns, header and contact field, in order
+REPORT_SCHEMA = (
+    ("Name", "name"),
+    ("Email", "email"),
+    ("JobTitle", "job"),
+    ("Organization", "organization"),
+    ("Region", "region"),
+    ("City", "city"),
+)
+REPORT_HEADERS = [header for header, _ in REPORT_SCHEMA]
+REPORT_COLUMNS = [column for _, column in REPORT_SCHEMA]
+
+# Resumable uploads require chunks multiple of 256 KB
+CHUNK_SIZE = int(os.getenv("REPORT_UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024))
+SPOOL_SIZE = 16 * 1024 * 1024
+
+_bucket = None
+
+
+def get_bucket():
+    """Return the bucket where reports are uploaded.
+
+    Returns
+    -------
+    google.cloud.storage.Bucket
+        The default firebase bucket, or the one given to ``set_bucket``.
+
+    """
+    if _bucket is not None:
+        return _bucket
+
+    from firebase_admin import storage
+
+    return storage.bucket(app=get_app())
+
+
+def set_bucket(bucket):
+    """Replace the report bucket, e.g. by ``FakeBucket``."""
+    global _bucket
+    _bucket = bucket
+
+
+class _SpooledUpload(io.RawIOBase):
+    """Writable stream uploaded on close, for clients without ``blob.open``.
+
+    Data stays in memory up to ``SPOOL_SIZE`` and goes to an anonymous temp
+    file past it, which is removed as soon as the upload ends.
+    """
+
+    def __init__(self, blob, content_type):
+        super().__init__()
+        self.blob = blob
+        self.content_type = content_type
+        self._buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE)
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self._buffer.write(data)
+
+    def tell(self):
+        return self._buffer.tell()
+
+    def close(self):
+        if not self.closed:
+            self._buffer.seek(0)
+            self.blob.upload_from_file(
+                self._buffer, content_type=self.content_type
+            )
+            self._buffer.close()
+        super().close()
+
+
+def open_upload_stream(blob, content_type):
+    """Open a writable binary stream that uploads to blob.
+
+    With google-cloud-storage >= 1.38 the data is sent in resumable chunks of
+    ``CHUNK_SIZE`` while it is written. Older clients fall back to a spooled
+    buffer uploaded on close.
+
+    Parameters
+    ----------
+    blob : google.cloud.storage.Blob
+        Destination blob.
+    content_type : str
+        Mime type of the report.
+
+    Returns
+    -------
+    io.BufferedIOBase
+        Stream to write the report into, closing it finishes the upload.
+
+    """
+    if hasattr(blob, "open"):
+        return blob.open(
+            "wb", chunk_size=CHUNK_SIZE, content_type=content_type
+        )
+    return _SpooledUpload(blob, content_type)
+
+
+class _SpreadsheetReportWriter:
+    """Base of the spreadsheet writers, rolling rows over extra sheets.
+
+    When a sheet reaches ``max_rows``, the next rows go to a new sheet that
+    starts with the header again.
+
+    Attributes
+    ----------
+    stream : io.BufferedIOBase
+        Where the workbook is written.
+    headers : List[str]
+        Header of every sheet.
+
+    """
+
+    max_rows = None
+    sheet_name = "Contatos"
+
+    def __init__(self, stream, headers):
+        self.stream = stream
+        self.headers = headers
+        self._sheets = 0
+        self._sheet = None
+        self._line = 0
+        self._new_sheet()
+
+    def _new_sheet(self):
+        self._sheets += 1
+        name = self.sheet_name
+        if self._sheets > 1:
+            name = "{} {}".format(self.sheet_name, self._sheets)
+        self._sheet = self._add_sheet(name)
+        self._line = 0
+        self._write(self._sheet, 0, self.headers)
+        self._line = 1
+
+    def write_row(self, values):
+        """Write a row of values in the next line."""
+        if self._line >= self.max_rows:
+            self._new_sheet()
+        self._write(self._sheet, self._line, values)
+        self._line += 1
+
+
+class XlsReportWriter(_SpreadsheetReportWriter):
+    """Write report rows into a legacy ``.xls`` workbook.
+
+    xlwt keeps the cells in memory until ``close``, which serializes the
+    workbook directly into the upload stream.
+    """
+
+    extension = "xls"
+    content_type = "application/vnd.ms-excel"
+    max_rows = 65536
+    dependency = "xlwt"
+
+    def _add_sheet(self, name):
+        if not hasattr(self, "_workbook"):
+            from xlwt import Workbook
+
+            self._workbook = Workbook()
+        return self._workbook.add_sheet(name)
+
+    def _write(self, sheet, line, values):
+        for column, value in enumerate(values):
+            sheet.write(line, column, value)
+
+    def close(self):
+        """Serialize the workbook into the stream."""
+        self._workbook.save(self.stream)
+
+
+class XlsxReportWriter(_SpreadsheetReportWriter):
+    """Write report rows into a ``.xlsx`` workbook in constant memory mode.
+
+    Each row is flushed to disk as soon as the next one is written, so the
+    memory does not grow with the report. Needs ``xlsxwriter``.
+    """
+
+    extension = "xlsx"
+    content_type = (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    )
+    max_rows = 1048576
+    dependency = "xlsxwriter"
+
+    def _add_sheet(self, name):
+        if not hasattr(self, "_workbook"):
+            import xlsxwriter
+
+            self._workbook = xlsxwriter.Workbook(
+                self.stream, {"constant_memory": True}
+            )
+        return self._workbook.add_worksheet(name)
+
+    def _write(self, sheet, line, values):
+        sheet.write_row(line, 0, values)
+
+    def close(self):
+        """Write the zip container into the stream."""
+        self._workbook.close()
+
+
+class CsvReportWriter:
+    """Stream report rows as utf-8 CSV.
+
+    Rows are encoded in batches of ``batch_rows`` and written to the stream
+    right away, so only one batch is kept in memory.
+
+    Attributes
+    ----------
+    stream : io.BufferedIOBase
+        Where the rows are written.
+
+    """
+
+    extension = "csv"
+    content_type = "text/csv; charset=utf-8"
+    dependency = None
+    batch_rows = 1000
+
+    def __init__(self, stream, headers):
+        self.stream = stream
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+        self._rows = 0
+        self.write_row(headers)
+
+    def write_row(self, values):
+        """Write a row of values."""
+        self._writer.writerow(values)
+        self._rows += 1
+        if self._rows >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        self.stream.write(self._buffer.getvalue().encode("utf-8"))
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self._rows = 0
+
+    def close(self):
+        """Write the pending rows."""
+        self._flush()
+
+
+class ParquetReportWriter:
+    """Write report rows as a Parquet file, for analytics tools.
+
+    Rows are converted to columnar row groups of ``batch_rows``, every
+    column stored as string. Needs ``pyarrow``.
+
+    Attributes
+    ----------
+    stream : io.BufferedIOBase
+        Where the file is written.
+
+    """
+
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+    dependency = "pyarrow"
+    batch_rows = 10000
+
+    def __init__(self, stream, headers):
+        import pyarrow
+        import pyarrow.parquet
+
+        self.stream = stream
+        self.headers = headers
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema(
+            [(header, pyarrow.string()) for header in headers]
+        )
+        self._writer = pyarrow.parquet.ParquetWriter(
+            pyarrow.PythonFile(stream, mode="w"), self._schema
+        )
+        self._columns = [[] for _ in headers]
+
+    def write_row(self, values):
+        """Write a row of values."""
+        for column, value in zip(self._columns, values):
+            column.append(value)
+        if len(self._columns[0]) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if self._columns[0]:
+            self._writer.write_table(
+                self._pyarrow.Table.from_arrays(
+                    [self._pyarrow.array(c, self._pyarrow.string())
+                     for c in self._columns],
+                    schema=self._schema,
+                )
+            )
+            self._columns = [[] for _ in self.headers]
+
+    def close(self):
+        """Write the pending rows and the file footer."""
+        self._flush()
+        self._writer.close()
+
+
+REPORT_WRITERS = {
+    writer.extension: writer
+    for writer in (
+        XlsReportWriter,
+        XlsxReportWriter,
+        CsvReportWriter,
+        ParquetReportWriter,
+    )
+}
+
+
+def get_writer_class(report_format):
+    """Return the writer of a report format, if it can be used.
+
+    Parameters
+    ----------
+    report_format : str
+        ``xls``, ``xlsx``, ``csv`` or ``parquet``.
+
+    Returns
+    -------
+    type
+        The writer class, or None if the format is unknown or its optional
+        dependency is not installed.
+
+    """
+    writer = REPORT_WRITERS.get(report_format, None)
+    if writer is None:
+        return None
+    if writer.dependency is not None and not importlib.util.find_spec(
+        writer.dependency
+    ):
+        return None
+    return writer
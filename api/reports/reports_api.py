@@ -6,23 +6,114 @@ from api.server import api_blueprint
 from flask_restplus import Resource, reqparse, fields
 from api.contacts.contacts_api import ContactApi
 
-import uuid
-
-
 import os
 
-from firebase_admin import credentials, initialize_app, storage
-
-
-import xlwt 
-from xlwt import Workbook 
+from api.reports.report_writer import (
+    REPORT_COLUMNS,
+    REPORT_HEADERS,
+    get_bucket,
+    get_writer_class,
+    open_upload_stream,
+)
+from api.reports.report_store import (
+    find_report,
+    prune_reports,
+    report_blob_name,
+    report_key,
+)
 
-from api.ApiCodes import NO_AUTH_CODE, INVALID_CREDENTIALS
+from api.ApiCodes import (
+    NO_AUTH_CODE,
+    INVALID_CREDENTIALS,
+    INVALID_REPORT_FORMAT,
+    QUEUE_FULL,
+)
+from api.metrics.metrics import namespace, timed
+from api.jobs.job_pool import JobPool, QueueFull
 
 report_namespace = api_blueprint.namespace(
     "report", description="Generate reports"
 )
 
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "2"))
+REPORT_QUEUE_DEPTH = int(os.getenv("REPORT_QUEUE_DEPTH", "8"))
+
+# Jobs live in this process, status must be asked to the same instance
+report_jobs = JobPool(REPORT_WORKERS, REPORT_QUEUE_DEPTH, name="report")
+
+parser = reqparse.RequestParser()
+parser.add_argument("sync", type=str, location="args")
+parser.add_argument("format", type=str, location="args", default="xls")
+
+
+def generate_report(token, report_format="xls"):
+    """Build the contacts report and upload it to the storage bucket.
+
+    Parameters
+    ----------
+    token : str
+        OAuth2 access token given by google.
+    report_format : str
+        ``xls``, ``xlsx``, ``csv`` or ``parquet``.
+
+    Returns
+    -------
+    dict
+        {"url": public_url}, or the contacts api error.
+    int
+        Response code
+
+    """
+    writer_class = get_writer_class(report_format)
+    if writer_class is None:
+        return INVALID_REPORT_FORMAT
+
+    api = ContactApi()
+
+    contacts = api._get_list_of_contacts(
+        grouped=False, token=token, fields=REPORT_COLUMNS
+    )
+
+    if contacts[1] == 200:
+
+        bucket = get_bucket()
+        name = report_blob_name(
+            report_key(contacts[0]['contacts'], REPORT_COLUMNS, report_format),
+            writer_class.extension,
+        )
+
+        blob = find_report(bucket, name)
+        if blob is not None:
+            return {'url': blob.public_url}, 200
+
+        blob = bucket.blob(name)
+
+        stream = open_upload_stream(blob, writer_class.content_type)
+        writer = writer_class(stream, REPORT_HEADERS)
+
+        with timed("report_write"):
+            for contact in contacts[0]['contacts']:
+                writer.write_row(
+                    [contact[column] for column in REPORT_COLUMNS]
+                )
+
+        with timed("storage_upload"):
+            writer.close()
+            stream.close()
+
+        blob.make_public()
+        prune_reports(bucket)
+
+        return {'url': blob.public_url}, 200
+
+    return contacts
+
+
+def _report_job(token, report_format):
+    with namespace("report"):
+        return generate_report(token, report_format)
+
+
 @report_namespace.header(
     "authorization-code",
     "OAuth2 Access Token given by google api.",
@@ -31,62 +122,83 @@ report_namespace = api_blueprint.namespace(
 @report_namespace.doc(
     responses={
         200: "OK",
+        202: "Report job accepted",
         461: "Invalid Token",
         460: "No authorization-code in headers",
         462: "Another errors",
+        466: "Google People API unavailable",
+        467: "Unsupported report format",
+        503: "Too many reports being generated",
+    },
+    params={
+        "sync": "Specify sync=true to wait for the report and get its url, instead of a job id",
+        "format": "Report format: xls (default), xlsx, csv or parquet",
     },
 )
 @report_namespace.route("/")
 class ReportApi(Resource):
     
     def get(self):
-        """GET endpoint that returns an excel report with contacts data.
-        
+        """GET endpoint that generates a report with contacts data.
+
+        The report is generated by a background job, whose status and final
+        url are given by ``GET /report/<job_id>``.
+
         Returns
         -------
-        str
-            Return an firebase storage link to download.
+        dict
+            The job id, or the firebase storage link when sync=true.
         int:
             Response code
         """
-        
-        api = ContactApi()
-        
-        contacts = api._get_list_of_contacts(grouped=False)
-        
-        if contacts[1] == 200:
-        
-            wb = Workbook()
-            sheet1 = wb.add_sheet('Contatos')
-            
-            line = 0
-            column = 0
-            for contact in ['Name', 'Email', 'JobTitle', 'Organization', "Region", "City"]:
-                sheet1.write(line, column, contact)
-                column += 1
-            
-            for contact in contacts[0]['contacts']:
-                line += 1
-                column = 0
-                
-                for key, value in contact.items():
-                    if(str(key) == "id" or str(key) == 'photo_url'):
-                        ...
-                    else:
-                        sheet1.write(line, column, value)
-                        column += 1
-            
-            file_path = '/tmp/{}.xls'.format(uuid.uuid4())
-            wb.save(file_path)
-            
-            
-            
-            bucket = storage.bucket()
-            blob = bucket.blob(file_path)
-            blob.upload_from_filename(file_path)
-
-            blob.make_public()
-            
-            return {'url': blob.public_url}, 200
+        token = request.headers.get("authorization-code")
+        if token is None:
+            return NO_AUTH_CODE
+
+        args = parser.parse_args()
+        if get_writer_class(args["format"]) is None:
+            return INVALID_REPORT_FORMAT
+
+        if args["sync"] == "true":
+            return generate_report(token, args["format"])
+
+        try:
+            job = report_jobs.submit(_report_job, token, args["format"])
+        except QueueFull:
+            return QUEUE_FULL
+
+        return {"job_id": job.id, "status": job.status}, 202
+
+
+@report_namespace.doc(
+    responses={
+        200: "OK",
+        404: "Job not found",
+    },
+)
+@report_namespace.route("/<string:job_id>")
+class ReportJobApi(Resource):
+
+    def get(self, job_id):
+        """GET endpoint that returns the status of a report job.
+
+        Returns
+        -------
+        dict
+            Job status, with the report url once done.
+        int:
+            Response code
+        """
+        job = report_jobs.get(job_id)
+        if job is None:
+            return {"error": "Job not found."}, 404
 
-        return contacts, 200
\ No newline at end of file
+        data = job.to_dict()
+        if job.status == "done":
+            payload, code = job.result
+            if code == 200:
+                data["url"] = payload["url"]
+            else:
+                data["status"] = "failed"
+                data["error"] = payload
+        return data, 200
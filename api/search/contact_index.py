@@ -0,0 +1,311 @@
+"""In-memory search index over the normalized contacts of a user."""
+import heapq
+import os
+from bisect import bisect_left, insort
+
+from api.models.Statistics import ContactStatistics
+from api.sync.snapshot_store import SnapshotStore
+
+SEARCH_INDEX_MAX_USERS = int(os.getenv("SEARCH_INDEX_MAX_USERS", "32"))
+
+# Above this share of changed contacts the index is rebuilt, not updated
+REBUILD_RATIO = 0.5
+
+# Weight of an exact and of a prefix match of a query token, per field
+TERM_WEIGHTS = {"name": (4, 3), "email": (2, 1)}
+
+# Contact fields of the exact filters
+FILTER_FIELDS = ("organization", "city", "region")
+
+# Sorts after every term starting with the prefix it is appended to
+_LAST_CHAR = "\U0010ffff"
+
+
+def _contact_terms(contact):
+    """Get the terms of a contact matched by the query prefixes.
+
+    The terms are the words of the name, the whole email and its domain,
+    casefolded, so "jo" finds "John Doe" and "jo@x.com", and "x.c" finds
+    every contact of "x.com".
+
+    Returns
+    -------
+    dict
+        Terms of each field in ``TERM_WEIGHTS``, {"name": {"john", "doe"}}
+
+    """
+    email = contact["email"].casefold()
+    return {
+        "name": set(contact["name"].casefold().split()),
+        "email": {email, email.partition("@")[2]},
+    }
+
+
+def _query_tokens(query):
+    return list(dict.fromkeys(query.casefold().split()))
+
+
+class ContactIndex:
+    """Prefix and filter index over the contacts of a snapshot.
+
+    Every term is kept with its contact id in a sorted list per field, so
+    the contacts with a term starting with a prefix are a contiguous range
+    found with bisect. The filter values map to the ids of their contacts.
+
+    Like ``Snapshot``, an index is never changed once built:
+    ``apply_delta`` returns a new one, so searches running in other
+    threads are not affected.
+
+    Attributes
+    ----------
+    contacts : dict
+        Indexed contacts, keyed by id, the ``Snapshot.contacts`` dict when
+        built from a snapshot.
+
+    """
+
+    __slots__ = ("contacts", "_terms", "_filters")
+
+    def __init__(self, contacts, terms=None, filters=None):
+        self.contacts = contacts
+
+        if terms is None:
+            terms = {field: [] for field in TERM_WEIGHTS}
+            filters = {field: {} for field in FILTER_FIELDS}
+            for contact_id, contact in contacts.items():
+                for field, values in _contact_terms(contact).items():
+                    terms[field].extend((term, contact_id) for term in values)
+                for field in FILTER_FIELDS:
+                    filters[field].setdefault(
+                        contact[field].casefold(), set()
+                    ).add(contact_id)
+            for values in terms.values():
+                values.sort()
+
+        self._terms = terms
+        self._filters = filters
+
+    def apply_delta(self, removed, added, contacts):
+        """Build the index of the next snapshot from its changed contacts.
+
+        Parameters
+        ----------
+        removed : List[dict]
+            Removed contacts, and the old data of the changed ones.
+        added : List[dict]
+            New contacts, and the new data of the changed ones.
+        contacts : dict
+            Contacts of the next snapshot, keyed by id.
+
+        Returns
+        -------
+        ContactIndex
+            New index, the current one is left untouched.
+
+        """
+        terms = {field: list(values) for field, values in self._terms.items()}
+        filters = {
+            field: dict(values) for field, values in self._filters.items()
+        }
+        # Os sets alterados sao copiados uma vez so, os outros compartilhados
+        copied = set()
+
+        def ids_of(field, value):
+            ids = filters[field].get(value, None)
+            if ids is None:
+                ids = filters[field][value] = set()
+                copied.add((field, value))
+            elif (field, value) not in copied:
+                ids = filters[field][value] = set(ids)
+                copied.add((field, value))
+            return ids
+
+        for contact in removed:
+            for field, values in _contact_terms(contact).items():
+                field_terms = terms[field]
+                for term in values:
+                    entry = (term, contact["id"])
+                    position = bisect_left(field_terms, entry)
+                    if (
+                        position < len(field_terms)
+                        and field_terms[position] == entry
+                    ):
+                        del field_terms[position]
+            for field in FILTER_FIELDS:
+                value = contact[field].casefold()
+                ids = ids_of(field, value)
+                ids.discard(contact["id"])
+                if not ids:
+                    del filters[field][value]
+
+        for contact in added:
+            for field, values in _contact_terms(contact).items():
+                for term in values:
+                    insort(terms[field], (term, contact["id"]))
+            for field in FILTER_FIELDS:
+                ids_of(field, contact[field].casefold()).add(contact["id"])
+
+        return ContactIndex(contacts, terms, filters)
+
+    def _range(self, field, token):
+        """Return the positions of the terms starting with token."""
+        terms = self._terms[field]
+        return (
+            bisect_left(terms, (token,)),
+            bisect_left(terms, (token + _LAST_CHAR,)),
+        )
+
+    def _score(self, contact, token):
+        """Score of the best term of a contact matching token, 0 if none."""
+        score = 0
+        for field, values in _contact_terms(contact).items():
+            exact, prefix = TERM_WEIGHTS[field]
+            for term in values:
+                if term == token:
+                    score = max(score, exact)
+                elif term.startswith(token):
+                    score = max(score, prefix)
+        return score
+
+    def search(self, query="", filters=None, limit=None):
+        """Find the contacts matching every query word and filter.
+
+        A contact matches a query word when its name has a word, or its
+        email or domain, starting with it. Results are ranked by the sum of
+        the ``TERM_WEIGHTS`` of the best match of each word, so exact and
+        name matches come first, then by name and id.
+
+        The rarest word is looked up first and the next words are only
+        checked against its contacts, so common prefixes like the first
+        letter of a name cost the size of the result, not of the index.
+
+        Parameters
+        ----------
+        query : str
+            Words to look for, case insensitive.
+        filters : dict
+            Exact values of ``FILTER_FIELDS``, {"city": "Campinas"}, case
+            insensitive.
+        limit : int
+            Maximum contacts returned, the best ranked ones are selected
+            with a heap. All of them when None.
+
+        Returns
+        -------
+        List[dict]
+            Matching contacts, best ranked first.
+        int
+            Number of matching contacts, before the limit.
+
+        """
+        candidates = None
+
+        if filters:
+            sets = sorted(
+                (
+                    self._filters[field].get(value.casefold(), set())
+                    for field, value in filters.items()
+                ),
+                key=len,
+            )
+            candidates = set(sets[0]).intersection(*sets[1:])
+
+        tokens = []
+        for token in _query_tokens(query):
+            ranges = {field: self._range(field, token) for field in TERM_WEIGHTS}
+            size = sum(end - start for start, end in ranges.values())
+            tokens.append((size, token, ranges))
+        tokens.sort()
+
+        scores = None if candidates is None else dict.fromkeys(candidates, 0)
+
+        for size, token, ranges in tokens:
+            if scores is not None and len(scores) < size:
+                # Menos candidatos que termos, confere cada candidato
+                matched = {}
+                for contact_id, score in scores.items():
+                    token_score = self._score(self.contacts[contact_id], token)
+                    if token_score:
+                        matched[contact_id] = score + token_score
+                scores = matched
+            else:
+                token_scores = {}
+                for field, (start, end) in ranges.items():
+                    exact, prefix = TERM_WEIGHTS[field]
+                    for term, contact_id in self._terms[field][start:end]:
+                        weight = exact if term == token else prefix
+                        if weight > token_scores.get(contact_id, 0):
+                            token_scores[contact_id] = weight
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        contact_id: score + token_scores[contact_id]
+                        for contact_id, score in scores.items()
+                        if contact_id in token_scores
+                    }
+            if not scores:
+                break
+
+        if not scores:
+            return [], 0
+
+        contacts = self.contacts
+
+        def key(contact_id):
+            return (
+                -scores[contact_id],
+                contacts[contact_id]["name"].casefold(),
+                contact_id,
+            )
+
+        if limit is None:
+            ranked = sorted(scores, key=key)
+        else:
+            ranked = heapq.nsmallest(limit, scores, key=key)
+
+        return [contacts[contact_id] for contact_id in ranked], len(scores)
+
+
+# Index of each snapshot searched, least used evicted
+indexes = SnapshotStore(SEARCH_INDEX_MAX_USERS)
+
+
+def get_index(key, contacts):
+    """Get the index of some contacts, updating the stored one.
+
+    When the contacts changed since the stored index was built, only the
+    changed contacts are indexed again, unless they are more than
+    ``REBUILD_RATIO`` of the address book.
+
+    Parameters
+    ----------
+    key : str
+        Snapshot key of the contacts, see ``snapshot_key``.
+    contacts : dict
+        Current contacts, keyed by id.
+
+    Returns
+    -------
+    ContactIndex
+        Index of contacts.
+
+    """
+    index = indexes.get(key)
+
+    if index is not None and index.contacts is contacts:
+        return index
+
+    if index is None:
+        index = ContactIndex(contacts)
+    else:
+        removed, added = ContactStatistics.diff(index.contacts, contacts)
+        if not removed and not added:
+            index = ContactIndex(contacts, index._terms, index._filters)
+        elif len(removed) + len(added) > REBUILD_RATIO * len(contacts):
+            index = ContactIndex(contacts)
+        else:
+            index = index.apply_delta(removed, added, contacts)
+
+    indexes.put(key, index)
+    return index
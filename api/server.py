@@ -1,6 +1,8 @@
 from flask import Flask, Blueprint, request, send_file, url_for
 from flask_cors import CORS
 from flask_restplus import Api, Namespace, Resource, fields
+from api.codec.compression import compress_response
+from api.codec.json_codec import output_json
 import os
 
 app = Flask(__name__)
@@ -21,6 +23,9 @@ api_blueprint = Api(
     title="Super OrgContact API",
     description="Deal with some google people api requests",
 )
+api_blueprint.representations["application/json"] = output_json
+
+app.after_request(compress_response)
 
 CORS(app, resources={r"/*": {"origins": "*"}})
 
@@ -28,3 +33,5 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 import api.user.user_api
 import api.contacts.contacts_api
 import api.reports.reports_api
+import api.metrics.metrics_api
+import api.startup.warmup_api
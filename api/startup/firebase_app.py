@@ -0,0 +1,32 @@
+"""Module with the Firebase app, initialized on first use."""
+import os
+import threading
+
+STORAGE_BUCKET = os.getenv(
+    "FIREBASE_STORAGE_BUCKET", "desafio-conecta-d4fbb.appspot.com"
+)
+
+_lock = threading.Lock()
+
+
+def get_app():
+    """Return the default Firebase app, initializing it on the first call.
+
+    An app already initialized, like the one of ``testserver.py``, is
+    reused as is.
+
+    Returns
+    -------
+    firebase_admin.App
+        The default app.
+
+    """
+    import firebase_admin
+
+    with _lock:
+        try:
+            return firebase_admin.get_app()
+        except ValueError:
+            return firebase_admin.initialize_app(
+                options={"storageBucket": STORAGE_BUCKET}
+            )
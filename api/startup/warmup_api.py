@@ -0,0 +1,67 @@
+"""Module for the warmup endpoint, which loads what the app loads lazily."""
+import importlib
+import importlib.util
+import logging
+import time
+
+from api.server import app
+from api.reports.report_writer import REPORT_WRITERS, get_bucket
+from api.upstream.people_client import get_client
+
+
+def _warm_firestore():
+    from fireo.database import db
+
+    importlib.import_module("api.models.User")
+    db.conn
+
+
+def _warm_report_writers():
+    for writer in REPORT_WRITERS.values():
+        if writer.dependency is not None and importlib.util.find_spec(
+            writer.dependency
+        ):
+            importlib.import_module(writer.dependency)
+
+
+# Steps in the order they are warmed, each one is cheap once done
+WARMUP_STEPS = (
+    ("people_client", get_client),
+    ("firestore", _warm_firestore),
+    ("storage", get_bucket),
+    ("report_writers", _warm_report_writers),
+)
+
+
+def warm_up():
+    """Import the heavy dependencies and create the upstream clients.
+
+    Returns
+    -------
+    dict
+        Seconds spent in each step, and the error of the failed ones:
+        {"people_client": {"seconds": 0.01}, "storage": {"seconds": 0.2,
+        "error": "..."}, ...}
+
+    """
+    steps = {}
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        steps[name] = {}
+        try:
+            step()
+        except Exception as e:
+            logging.warning("[warmup_api.py] Warmup of %s failed: %r", name, e)
+            steps[name]["error"] = repr(e)
+        steps[name]["seconds"] = round(time.perf_counter() - start, 6)
+    return steps
+
+
+@app.route("/_ah/warmup")
+def warmup():
+    """Load everything the first requests would, before they arrive.
+
+    Always answers 200, a failed step only means that the first request
+    using it will try again.
+    """
+    return {"steps": warm_up()}
@@ -0,0 +1,219 @@
+"""Module with a local fake of the Google People API, for offline use.
+
+The fake keeps an address book in memory and answers the same calls that
+``ContactApi`` makes through ``api.upstream.people_client``, including
+pagination and sync tokens. Install it with::
+
+    from api.upstream.people_client import set_client
+    set_client(FakePeopleUpstream(connections))
+"""
+import json
+from collections import OrderedDict
+
+
+class FakeResponse:
+    """Minimal stand-in of ``requests.Response``.
+
+    Attributes
+    ----------
+    status_code : int
+        HTTP status code.
+    text : str
+        Json encoded body.
+
+    """
+
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.text = json.dumps(data)
+        self.content = self.text.encode("utf-8")
+
+    def json(self):
+        """Decode the body."""
+        return json.loads(self.text)
+
+
+# Always returned, whatever the personFields
+_PERSON_KEYS = ("resourceName", "etag", "metadata")
+
+
+def project_person(person, person_fields):
+    """Keep only the personFields asked for, like the real api does."""
+    if person_fields is None:
+        return person
+    keep = set(person_fields.split(",")).union(_PERSON_KEYS)
+    return {k: v for k, v in person.items() if k in keep}
+
+
+def _error(code, message, status):
+    return FakeResponse(
+        code, {"error": {"code": code, "message": message, "status": status}}
+    )
+
+
+class FakePeopleUpstream:
+    """In-memory People API with connections listing and sync tokens.
+
+    Every mutation is recorded with an increasing version, so a sync token
+    only needs to carry the version it was issued at. Calling
+    ``expire_sync_tokens`` makes all the issued tokens answer 410, like
+    the real api does after some days.
+
+    Attributes
+    ----------
+    token : str
+        Access token accepted by the fake. None accepts any token.
+    owner : str
+        Resource name of the user owning the address book, returned by
+        ``people/me`` whatever the token.
+    version : int
+        Version of the last mutation.
+    calls : List[tuple]
+        (path, params) of every call received, for assertions.
+
+    """
+
+    def __init__(self, connections=None, token=None, owner="people/owner"):
+        self.token = token
+        self.owner = owner
+        self.version = 0
+        self.calls = []
+        self._connections = OrderedDict()
+        self._changes = []
+        self._generation = 0
+
+        for connection in connections or []:
+            self._connections[connection["resourceName"]] = connection
+
+    def add(self, connection):
+        """Add or replace a connection."""
+        self.version += 1
+        self._connections[connection["resourceName"]] = connection
+        self._changes.append((self.version, connection["resourceName"]))
+
+    update = add
+
+    def delete(self, resource_name):
+        """Delete a connection by its resourceName."""
+        self.version += 1
+        self._connections.pop(resource_name, None)
+        self._changes.append((self.version, resource_name))
+
+    def expire_sync_tokens(self):
+        """Invalidate every sync token issued so far."""
+        self._generation += 1
+
+    def _sync_token(self):
+        return "{}:{}".format(self._generation, self.version)
+
+    def _changed_since(self, sync_token):
+        generation, version = [int(v) for v in sync_token.split(":")]
+        if generation != self._generation:
+            return None
+
+        changed = OrderedDict()
+        for change_version, resource_name in self._changes:
+            if change_version > version:
+                changed.pop(resource_name, None)
+                changed[resource_name] = True
+
+        items = []
+        for resource_name in changed:
+            connection = self._connections.get(resource_name, None)
+            if connection is None:
+                connection = {
+                    "resourceName": resource_name,
+                    "metadata": {"deleted": True},
+                }
+            items.append(connection)
+        return items
+
+    def _list_connections(self, params):
+        sync_token = params.get("syncToken", None)
+
+        if sync_token is not None:
+            items = self._changed_since(sync_token)
+            if items is None:
+                return _error(410, "Sync token is expired.", "GONE")
+        else:
+            items = list(self._connections.values())
+
+        page_size = int(params.get("pageSize", 100))
+        offset = int(params.get("pageToken", 0) or 0)
+        page = items[offset:offset + page_size]
+
+        data = {"totalItems": len(items)}
+        if page:
+            person_fields = params.get("personFields", None)
+            data["connections"] = [
+                project_person(c, person_fields) for c in page
+            ]
+        if offset + page_size < len(items):
+            data["nextPageToken"] = str(offset + page_size)
+        elif sync_token is not None or params.get("requestSyncToken"):
+            data["nextSyncToken"] = self._sync_token()
+
+        return FakeResponse(200, data)
+
+    def _batch_get(self, resource_names, person_fields=None):
+        responses = []
+        for resource_name in resource_names:
+            connection = self._connections.get(resource_name, None)
+            response = {"requestedResourceName": resource_name}
+            if connection is None:
+                response["httpStatusCode"] = 404
+                response["status"] = {
+                    "code": 5,
+                    "message": "Requested entity was not found.",
+                }
+            else:
+                response["httpStatusCode"] = 200
+                response["person"] = project_person(
+                    connection, person_fields
+                )
+            responses.append(response)
+        return FakeResponse(200, {"responses": responses})
+
+    def get(self, path, token, params=None, timeout=None):
+        """Answer a call with the same signature of ``PeopleClient.get``."""
+        if isinstance(params, list):
+            resource_names = [v for k, v in params if k == "resourceNames"]
+            params = dict(params)
+            params["resourceNames"] = resource_names
+        params = dict(params or {})
+        self.calls.append((path, params))
+
+        if self.token is not None and token != self.token:
+            return _error(
+                401,
+                "Request had invalid authentication credentials.",
+                "UNAUTHENTICATED",
+            )
+
+        if path == "/people/me/connections":
+            return self._list_connections(params)
+
+        if path == "/people:batchGet":
+            if len(params.get("resourceNames", [])) > 200:
+                return _error(
+                    400, "Too many resource names.", "INVALID_ARGUMENT"
+                )
+            return self._batch_get(
+                params.get("resourceNames", []), params.get("personFields")
+            )
+
+        if path == "/people/me":
+            return FakeResponse(
+                200,
+                project_person(
+                    {"resourceName": self.owner, "etag": "%owner"},
+                    params.get("personFields", None),
+                ),
+            )
+
+        connection = self._connections.get(path.lstrip("/"), None)
+        if connection is None:
+            return _error(404, "Requested entity was not found.", "NOT_FOUND")
+        return FakeResponse(
+            200, project_person(connection, params.get("personFields", None))
+        )
@@ -0,0 +1,147 @@
+"""Module to store per-user normalized contact snapshots between syncs."""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+SNAPSHOT_MAX_USERS = int(os.getenv("SNAPSHOT_MAX_USERS", "256"))
+
+
+def snapshot_key(owner, person_fields=None):
+    """Return the snapshot key of a user.
+
+    Only a digest is kept in memory as a key.
+
+    Parameters
+    ----------
+    owner : str
+        Resource name of the user owning the contacts, like
+        ``people/123``. Access tokens rotate, so they are not used as the
+        key, see ``ContactApi._token_owner``.
+    person_fields : str
+        personFields mask of the snapshot. Sync tokens are only valid with
+        the same request, so each mask has its own snapshot.
+
+    Returns
+    -------
+    str
+        Hex digest identifying the snapshot owner.
+
+    """
+    if person_fields is not None:
+        owner = "{}|{}".format(owner, person_fields)
+    return hashlib.sha256(owner.encode("utf-8")).hexdigest()
+
+
+class Snapshot:
+    """Immutable view of a user address book at a given sync token.
+
+    Attributes
+    ----------
+    sync_token : str
+        People API token to ask for the changes after this snapshot.
+    contacts : dict
+        Normalized contacts, keyed by contact id.
+    version : int
+        Incremented each time a delta is applied.
+
+    """
+
+    __slots__ = ("sync_token", "contacts", "version")
+
+    def __init__(self, sync_token, contacts, version=0):
+        self.sync_token = sync_token
+        self.contacts = contacts
+        self.version = version
+
+    def to_list(self):
+        """Return the contacts in the same format of a full fetch.
+
+        Returns
+        -------
+        dict
+            {"contacts": [contact1, contact2, ...]}
+
+        """
+        return {"contacts": list(self.contacts.values())}
+
+    def apply_delta(self, removed_ids, added, sync_token):
+        """Build the next snapshot from a set of changes.
+
+        Changed connections must be listed in ``removed_ids`` and, when they
+        still have an email, in ``added`` too.
+
+        Parameters
+        ----------
+        removed_ids : Iterable[str]
+            Ids of deleted or changed contacts.
+        added : List[dict]
+            Normalized new or changed contacts.
+        sync_token : str
+            Token returned with the last delta page.
+
+        Returns
+        -------
+        Snapshot
+            New snapshot, the current one is left untouched.
+
+        """
+        added = list(added)
+        removed_ids = list(removed_ids)
+        if not added and not removed_ids:
+            return Snapshot(sync_token, self.contacts, self.version)
+
+        contacts = self.contacts.copy()
+
+        for contact_id in removed_ids:
+            contacts.pop(contact_id, None)
+
+        for contact in added:
+            contacts[contact["id"]] = contact
+
+        return Snapshot(sync_token, contacts, self.version + 1)
+
+
+class SnapshotStore:
+    """Thread safe in-process store of snapshots, evicting the least used.
+
+    Attributes
+    ----------
+    max_users : int
+        How many snapshots are kept before evicting.
+
+    """
+
+    def __init__(self, max_users=SNAPSHOT_MAX_USERS):
+        self.max_users = max_users
+        self._snapshots = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the snapshot stored under key, or None."""
+        with self._lock:
+            snapshot = self._snapshots.get(key, None)
+            if snapshot is not None:
+                self._snapshots.move_to_end(key)
+            return snapshot
+
+    def put(self, key, snapshot):
+        """Store a snapshot under key."""
+        with self._lock:
+            self._snapshots[key] = snapshot
+            self._snapshots.move_to_end(key)
+            while len(self._snapshots) > self.max_users:
+                self._snapshots.popitem(last=False)
+
+    def drop(self, key):
+        """Forget the snapshot stored under key."""
+        with self._lock:
+            self._snapshots.pop(key, None)
+
+    def clear(self):
+        """Forget every snapshot."""
+        with self._lock:
+            self._snapshots.clear()
+
+
+snapshots = SnapshotStore()
@@ -0,0 +1,108 @@
+"""Module with the async People API client, to run upstream calls at once.
+
+``httpx`` is an optional dependency, the concurrent paths are only enabled
+with ``PEOPLE_ASYNC=true`` when it is installed. A single event loop runs in
+a background thread of each worker, the request threads (or greenlets, under
+the gevent worker) hand their calls to it and wait for the results.
+"""
+import asyncio
+import importlib.util
+import os
+import threading
+
+from api.upstream.people_client import (
+    CONNECT_TIMEOUT,
+    PEOPLE_API_URL,
+    POOL_SIZE,
+    READ_TIMEOUT,
+)
+
+PEOPLE_ASYNC = os.getenv("PEOPLE_ASYNC") == "true"
+
+
+def is_enabled():
+    """Whether the concurrent upstream paths should be used."""
+    return PEOPLE_ASYNC and importlib.util.find_spec("httpx") is not None
+
+
+class AsyncPeopleClient:
+    """Async HTTP client for the Google People API, built on httpx.
+
+    Attributes
+    ----------
+    base_url : str
+        People API root url, without trailing slash.
+    client : httpx.AsyncClient
+        Client holding the connection pool.
+
+    """
+
+    def __init__(self, base_url=PEOPLE_API_URL, pool_size=POOL_SIZE):
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+            ),
+            timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        )
+
+    async def get(self, path, token, params=None):
+        """Make an authenticated GET, see ``PeopleClient.get``.
+
+        Returns
+        -------
+        httpx.Response
+            The upstream response, with the same status_code, text and
+            content attributes of ``requests.Response``.
+
+        """
+        return await self.client.get(
+            self.base_url + path,
+            params=params,
+            headers={"Authorization": "Bearer %s" % token},
+        )
+
+
+_lock = threading.Lock()
+_loop = None
+_client = None
+
+
+def _loop_and_client():
+    global _loop, _client
+
+    with _lock:
+        if _loop is None:
+            _client = AsyncPeopleClient()
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="people-async", daemon=True
+            ).start()
+    return _loop, _client
+
+
+def gather_get(calls):
+    """Run several People API GETs concurrently and wait for all of them.
+
+    Parameters
+    ----------
+    calls : List[tuple]
+        (path, token, params) of each call.
+
+    Returns
+    -------
+    List
+        For each call, in order, its response or the exception raised.
+
+    """
+    loop, client = _loop_and_client()
+
+    async def run():
+        return await asyncio.gather(
+            *[client.get(*call) for call in calls], return_exceptions=True
+        )
+
+    return asyncio.run_coroutine_threadsafe(run(), loop).result()
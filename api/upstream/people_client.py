@@ -0,0 +1,122 @@
+"""Module with the shared HTTP client for Google People API calls."""
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PEOPLE_API_URL = os.getenv(
+    "PEOPLE_API_URL", "https://people.googleapis.com/v1"
+)
+
+# One gunicorn worker serves at most GUNICORN_THREADS requests at a time, so
+# the pool never needs more connections than that to stay fully reused.
+POOL_SIZE = int(
+    os.getenv("PEOPLE_POOL_SIZE", os.getenv("GUNICORN_THREADS", "10"))
+)
+CONNECT_TIMEOUT = float(os.getenv("PEOPLE_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("PEOPLE_READ_TIMEOUT", "20"))
+
+
+class PeopleClient:
+    """Keep-alive HTTP client for the Google People API.
+
+    A single ``requests.Session`` is shared by every call, so requests made
+    by the same worker reuse the open TLS connections instead of opening a
+    new one each time.
+
+    Attributes
+    ----------
+    base_url : str
+        People API root url, without trailing slash.
+    timeout : tuple
+        Default (connect, read) timeout in seconds for each call.
+    session : requests.Session
+        Session holding the connection pool.
+
+    """
+
+    def __init__(
+        self,
+        base_url=PEOPLE_API_URL,
+        pool_size=POOL_SIZE,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=False
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def get(self, path, token, params=None, timeout=None):
+        """Make an authenticated GET to the People API.
+
+        Parameters
+        ----------
+        path : str
+            Path after the api root, like ``/people/me/connections``.
+        token : str
+            OAuth2 access token given by google.
+        params : Union[dict, list]
+            Query string parameters.
+        timeout : Union[float, tuple]
+            Overrides the default timeout for this call.
+
+        Returns
+        -------
+        requests.Response
+            The upstream response.
+
+        Raises
+        ------
+        requests.exceptions.RequestException
+            When the upstream can not be reached or times out.
+
+        """
+        return self.session.get(
+            self.base_url + path,
+            params=params,
+            headers={"Authorization": "Bearer %s" % token},
+            timeout=timeout or self.timeout,
+        )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the process-wide People API client, creating it on first use.
+
+    Returns
+    -------
+    PeopleClient
+        Client shared by every api namespace in this process.
+
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PeopleClient()
+    return _client
+
+
+def set_client(client):
+    """Replace the process-wide client, e.g. by a local fake upstream.
+
+    Parameters
+    ----------
+    client : object
+        Any object with the same ``get`` signature as ``PeopleClient``.
+
+    """
+    global _client
+
+    with _client_lock:
+        _client = client
@@ -0,0 +1,94 @@
+"""Module mapping the normalized contact fields to People API personFields.
+
+Each code path declares the contact fields it consumes, and only the
+personFields that fill them are requested from ``people/me/connections``.
+"""
+from collections import OrderedDict
+
+# Fields of a normalized contact, in the order they are returned
+CONTACT_FIELDS = (
+    "id",
+    "name",
+    "photo_url",
+    "email",
+    "job",
+    "organization",
+    "region",
+    "city",
+)
+
+# personFields filling each contact field, id comes from resourceName which
+# is always returned
+PERSON_FIELDS = OrderedDict(
+    [
+        ("id", ()),
+        ("name", ("names",)),
+        ("photo_url", ("photos",)),
+        ("email", ("emailAddresses",)),
+        ("job", ("organizations",)),
+        ("organization", ("organizations",)),
+        ("region", ("addresses",)),
+        ("city", ("addresses",)),
+    ]
+)
+
+# Order of the personFields in a mask, so equal requirements give one mask
+PERSON_FIELDS_ORDER = (
+    "names",
+    "emailAddresses",
+    "photos",
+    "addresses",
+    "organizations",
+)
+
+
+def person_fields_mask(fields=None):
+    """Return the personFields mask that fills the given contact fields.
+
+    ``emailAddresses`` is always requested, since the normalization drops
+    the contacts without an email.
+
+    Parameters
+    ----------
+    fields : Iterable[str]
+        Contact fields consumed by the caller, all of them when None.
+
+    Returns
+    -------
+    str
+        Comma separated personFields, like "emailAddresses,organizations".
+
+    """
+    if fields is None:
+        fields = CONTACT_FIELDS
+
+    needed = {"emailAddresses"}
+    for field in fields:
+        needed.update(PERSON_FIELDS[field])
+    return ",".join(f for f in PERSON_FIELDS_ORDER if f in needed)
+
+
+def filled_fields(person_fields):
+    """Return the contact fields filled by a personFields mask.
+
+    Parameters
+    ----------
+    person_fields : str
+        Mask returned by ``person_fields_mask``.
+
+    Returns
+    -------
+    List[str]
+        Contact fields in ``CONTACT_FIELDS`` order, the other ones keep the
+        defaults of a contact without them.
+
+    """
+    requested = set(person_fields.split(","))
+    return [
+        field
+        for field in CONTACT_FIELDS
+        if requested.issuperset(PERSON_FIELDS[field])
+    ]
+
+
+FULL_PERSON_FIELDS = person_fields_mask()
@@ -1,17 +1,204 @@
 from api.server import api_blueprint
 from flask_restplus import Resource, fields
-from flask import request
-from api.ApiCodes import NO_AUTH_CODE, INVALID_CREDENTIALS
-from api.models.User import User
+from flask import request, Response
+from api.ApiCodes import NO_AUTH_CODE, INVALID_CREDENTIALS, QUEUE_FULL
 from api.contacts.contacts_api import ContactApi
-from api.models.Contact import Contact
+from api.models.Statistics import ContactStatistics
+from api.metrics.metrics import namespace, timed
+from api.jobs.job_pool import JobPool, QueueFull
+from api.cache.cache import build_cache
+from api.sync.snapshot_store import SnapshotStore
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import json
+import logging
+import os
 
 
+# fireo and the Firestore client are only imported by the first request that
+# reads or saves a user (or by GET /_ah/warmup), to keep the startup fast
+
 user_namespace = api_blueprint.namespace(
     "user", description="Create and manage Users data"
 )
 
+# User documents read by GET /user, the dashboard polls it. A PUT in one
+# worker must be seen by the others, so only Redis is used when configured
+user_cache = build_cache(
+    "user", default_ttl=60, max_bytes=16 << 20, shared_only=True
+)
+
+
+# Contacts counted by the last PUT of each user, base of the next delta
+counted_contacts = SnapshotStore()
+
+STATS_VERIFY = os.getenv("STATS_VERIFY") == "true"
+
+# Contact fields read by the statistics, the only ones fetched by PUT /user
+STATISTICS_FIELDS = ContactStatistics.required_fields(
+    ContactStatistics.USER_DIMENSIONS
+)
+
+STATISTICS_WORKERS = int(os.getenv("STATISTICS_WORKERS", "2"))
+STATISTICS_QUEUE_DEPTH = int(os.getenv("STATISTICS_QUEUE_DEPTH", "32"))
+
+# Reads the saved statistics of a user while its contacts are fetched
+_firestore_reads = ThreadPoolExecutor(
+    max_workers=STATISTICS_WORKERS + 2, thread_name_prefix="firestore-read"
+)
+
+# Background PUT /user jobs, keyed by user id so repeated PUTs collapse and
+# the jobs of a user run one at a time
+statistics_jobs = JobPool(
+    STATISTICS_WORKERS, STATISTICS_QUEUE_DEPTH, name="statistics"
+)
+
+
+def _update_user(token, user_id, name, verify=False):
+    """Fetch the user contacts and save the user with its statistics.
+
+    Parameters
+    ----------
+    token : str
+        OAuth2 access token given by google.
+    user_id : str
+        User unique id.
+    name : str
+        User display name.
+    verify : bool
+        See ``UserApi._save_statistics``.
+
+    Returns
+    -------
+    dict
+        Dictionary containing error or success key.
+    int
+        Response Code
+
+    """
+    document = _firestore_reads.submit(_read_statistics, user_id)
+    contacts = ContactApi()._get_list_of_contacts(
+        grouped=False, token=token, fields=STATISTICS_FIELDS
+    )
+
+    if contacts[1] == 200:
+        result = UserApi._save_statistics(
+            user_id, name, contacts[0], verify, document
+        )
+        user_cache.delete(user_id)
+        return result, 200
+
+    return contacts
+
+
+def _statistics_job(token, user_id, name, verify):
+    with namespace("user"):
+        return _update_user(token, user_id, name, verify)
+
+
+def _user_document(user_id):
+    from api.models.User import User
+    from fireo.database import db
+
+    return db.conn.collection(User.collection_name).document(user_id)
+
+
+def _read_statistics(user_id):
+    """Read the saved name and statistics counters of a user.
+
+    Parameters
+    ----------
+    user_id : str
+        User unique id.
+
+    Returns
+    -------
+    DocumentSnapshot
+        Firestore snapshot with only name and contacts_statistics, its
+        ``exists`` is False when the user was never saved.
+
+    """
+    return _user_document(user_id).get(
+        field_paths=["name", "contacts_statistics"]
+    )
+
+
+def _count_statistics(contacts):
+    return {
+        dimension: counts["contacts"]
+        for dimension, counts in ContactStatistics.count(
+            contacts, ContactStatistics.USER_DIMENSIONS
+        ).items()
+    }
+
+
+def _save_user(user_id, name, statistics, chart):
+    """Save the whole user document, replacing the stored one."""
+    from api.models.User import User
+
+    user = User(id=user_id, name=name, query_id=user_id)
+    user.contacts_statistics = statistics
+    user.contacts_chart = chart
+    user.save()
+
+
+def _update_statistics(user_id, name, changed, chart, update_time):
+    """Write only the changed statistics counters of a saved user.
+
+    The write only succeeds if the document was not written since it was
+    read, since the changes are relative to the counters read then.
+
+    Parameters
+    ----------
+    user_id : str
+        User unique id.
+    name : str
+        User display name.
+    changed : dict
+        Changed counters, see ``ContactStatistics.apply_delta``.
+    chart : dict
+        The whole statistics in chart format.
+    update_time : datetime
+        ``update_time`` of the document the changes were computed from.
+
+    Returns
+    -------
+    bool
+        False when the document was changed or removed meanwhile, or a
+        counter key can not be used as a Firestore field path, so the user
+        must be fully saved.
+
+    """
+    from fireo.database import db
+    from google.api_core.exceptions import FailedPrecondition, NotFound
+    from google.cloud.firestore_v1 import DELETE_FIELD
+    from google.cloud.firestore_v1.field_path import FieldPath
+
+    fields = {"name": name, "query_id": user_id, "contacts_chart": chart}
+
+    try:
+        for dimension, counts in changed.items():
+            for value, count in counts.items():
+                path = FieldPath(
+                    "contacts_statistics", dimension, value
+                ).to_api_repr()
+                fields[path] = DELETE_FIELD if count is None else count
+
+        _user_document(user_id).update(
+            fields, option=db.conn.write_option(last_update_time=update_time)
+        )
+    except (FailedPrecondition, NotFound, TypeError, ValueError):
+        return False
+
+    return True
+
+
+def _etag(payload):
+    """Return a strong ETag of a json payload."""
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return '"{}"'.format(hashlib.sha1(encoded.encode("utf-8")).hexdigest())
+
+
 model = user_namespace.model(
     "User",
     {
@@ -30,8 +217,10 @@ model = user_namespace.model(
         461: "Invalid Token",
         460: "No authorization-code in headers",
         462: "Another errors",
+        466: "Google People API unavailable",
         463: "Argument missing in request data",
         465: "User Not Found",
+        503: "Too many statistics jobs pending",
     }
 )
 @user_namespace.route("/")
@@ -41,7 +230,13 @@ class UserApi(Resource):
         "OAuth2 Access Token given by google api.",
         required=True,
     )
-    @user_namespace.doc(body=model)
+    @user_namespace.doc(
+        body=model,
+        params={
+            "verify": "Specify verify=true to check the saved statistics against a full recount",
+            "async": "Specify async=true to compute the statistics in background and get 202, see /user/status",
+        },
+    )
     def put(self):
         """PUT endpoint that register a new user.
         
@@ -66,47 +261,130 @@ class UserApi(Resource):
                     463,
                 )
 
-            user = User(id=id, name=name, query_id=id)
+            verify = STATS_VERIFY or request.args.get("verify") == "true"
 
-            auxapi = ContactApi()
+            if request.args.get("async") == "true":
+                try:
+                    job = statistics_jobs.submit(
+                        _statistics_job, token, id, name, verify, key=id
+                    )
+                except QueueFull:
+                    return QUEUE_FULL
+                return {"job_id": job.id, "status": job.status}, 202
 
-            contacts = auxapi._get_list_of_contacts(grouped=False)
+            return _update_user(token, id, name, verify)
 
-            if contacts[1] == 200:
-                contacts_statistics = Contact.get_quantity_per_domain(
-                    contacts[0]
-                )
-                contacts_statistics_organization = Contact.get_quantity_per_organization(
-                    contacts[0]
-                )
-                contacts_statistics_jobtitle = Contact.get_quantity_per_job(
-                    contacts[0]
-                )
-                contacts_statistics_city = Contact.get_quantity_per_city(
-                    contacts[0]
+        else:
+            return NO_AUTH_CODE
+
+    @staticmethod
+    def _save_statistics(
+        user_id, name, contacts, verify=False, document=None
+    ):
+        """Save the user with the statistics of its contacts.
+
+        Only the counters that differ from the saved ones are written to
+        Firestore, with the chart computed from the new counters, and
+        nothing when none changed. The contacts counted in
+        the last call for the same user are kept in memory, and when their
+        counters are the saved ones only the added, removed and changed
+        contacts are counted. Otherwise, for instance when another worker
+        saved the user since, everything is counted again.
+
+        Parameters
+        ----------
+        user_id : str
+            User unique id.
+        name : str
+            User display name.
+        contacts : dict
+            Normalized contacts, {"contacts": [contact1, contact2, ...]}
+        verify : bool
+            Check the saved counters against a full recount, the user is
+            fully saved again when they do not match.
+        document : Future
+            ``_read_statistics`` of the user, started before the contacts
+            were fetched. Read here when None.
+
+        Returns
+        -------
+        dict
+            {"success": "User Saved"}, plus "consistent" when verifying.
+
+        """
+        from api.models.User import User
+
+        current = {contact["id"]: contact for contact in contacts["contacts"]}
+        counted = counted_contacts.get(user_id)
+        result = {"success": "User Saved"}
+
+        with timed("firestore_read"):
+            if document is None:
+                document = _read_statistics(user_id)
+            else:
+                document = document.result()
+        stored = document.to_dict() or {}
+        stored_statistics = stored.get("contacts_statistics") or {}
+
+        changed = None
+        if counted is not None and counted[1] == stored_statistics:
+            previous, statistics = counted
+            statistics = {k: dict(v) for k, v in statistics.items()}
+
+            with timed("aggregate"):
+                removed, added = ContactStatistics.diff(previous, current)
+                changed = ContactStatistics.apply_delta(
+                    statistics, removed, added, ContactStatistics.USER_DIMENSIONS
                 )
-                contacts_statistics_region = Contact.get_quantity_per_region(
-                    contacts[0]
+        else:
+            with timed("aggregate"):
+                statistics = _count_statistics(contacts)
+            if document.exists:
+                changed = ContactStatistics.changes(
+                    stored_statistics, statistics
                 )
 
-                user.contacts_statistics = {
-                    "domain": contacts_statistics["contacts"],
-                    "organization": contacts_statistics_organization[
-                        "contacts"
-                    ],
-                    "jobtitle": contacts_statistics_jobtitle["contacts"],
-                    "city": contacts_statistics_city["contacts"],
-                    "region": contacts_statistics_region["contacts"],
-                }
-                user.save()
-                return {"success": "User Saved"}, 200
+        # Sem contadores nem nome alterados nao ha o que gravar
+        if changed != {} or stored.get("name") != name:
+            chart = User.statistics_to_chart(
+                {"contacts_statistics": statistics}
+            )
+            with timed("firestore_save"):
+                if changed is None or not _update_statistics(
+                    user_id, name, changed, chart, document.update_time
+                ):
+                    _save_user(user_id, name, statistics, chart)
 
-            return contacts
+        if verify:
+            with timed("firestore_read"):
+                saved = _read_statistics(user_id).to_dict() or {}
+            mismatches = ContactStatistics.verify(
+                saved.get("contacts_statistics") or {},
+                contacts,
+                ContactStatistics.USER_DIMENSIONS,
+            )
+            result["consistent"] = not mismatches
+            if mismatches:
+                logging.warning(
+                    "[user_api.py] Saved statistics of %s differ from a full recount: %s",
+                    user_id,
+                    mismatches,
+                )
+                statistics = _count_statistics(contacts)
+                _save_user(
+                    user_id,
+                    name,
+                    statistics,
+                    User.statistics_to_chart(
+                        {"contacts_statistics": statistics}
+                    ),
+                )
 
-        else:
-            return NO_AUTH_CODE
+        counted_contacts.put(user_id, (current, statistics))
+        return result
 
     @user_namespace.doc(
+        responses={304: "Not Modified, the If-None-Match ETag is current"},
         params={
             "userId": "User unique id to get data on Firebase DB",
             "toChart": """Specify this =true if you wanna to retrive statistics \
@@ -130,19 +408,124 @@ class UserApi(Resource):
             Response Code
         """
         data = request.args
-        user_data = User.collection.filter(query_id=data.get("userId", None))
-        print("Tochart AQUIIIIIIIIIIII", data.get("toChart", None))
+        entry = UserApi._get_user(data.get("userId", None))
+
+        if entry is None:
+            return {"error": "User not found."}, 465
+
         if data.get("toChart", None) == "chart":
-            if user_data.get() is not None:
-                
-                return User.statistics_to_chart(
-                    user_data.get().to_dict()
-                ), 200
-                
-            else:
-                return {"error": "User not found."}, 465
+            payload, etag = entry["chart"], entry["chart_etag"]
         else:
-            if user_data.get() is not None:
-                return user_data.get().to_dict(), 200
-            else:
-                return {"error": "User not found."}, 465
+            payload, etag = entry["user"], entry["user_etag"]
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        # Comparacao fraca, a ETag de uma resposta comprimida vira W/"..."
+        if_none_match = request.headers.get("If-None-Match", "")
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        tags = [tag[2:] if tag.startswith("W/") else tag for tag in tags]
+        if etag in tags or if_none_match.strip() == "*":
+            return Response(status=304, headers=headers)
+
+        return payload, 200, headers
+
+    @staticmethod
+    def _get_user(user_id):
+        """Get a user document by its primary key, through the user cache.
+
+        The GET payloads and their ETags are computed once, when the user is
+        read from the database, and cached with it.
+
+        Parameters
+        ----------
+        user_id : str
+            User unique id, the same stored in id and query_id.
+
+        Returns
+        -------
+        dict
+            Dictionary following this structure, or None when not found:
+            {
+                "user": user data, as ``User.to_dict``,
+                "user_etag": '"..."',
+                "chart": user statistics in chart format,
+                "chart_etag": '"..."'
+            }
+
+        """
+        if not user_id:
+            return None
+
+        entry = user_cache.get(user_id)
+        if entry is None:
+            from api.models.User import User
+
+            user = User.collection.get(
+                "{}/{}".format(User.collection_name, user_id)
+            )
+            if user is None:
+                return None
+
+            user_data = user.to_dict()
+            chart = user_data.pop("contacts_chart", None)
+            if not chart:
+                # Usuarios salvos antes do grafico ser pre-calculado
+                chart = User.statistics_to_chart(user_data)
+
+            entry = {
+                "user": user_data,
+                "user_etag": _etag(user_data),
+                "chart": chart,
+                "chart_etag": _etag(chart),
+            }
+            user_cache.set(user_id, entry)
+
+        return entry
+
+
+@user_namespace.doc(responses={200: "OK"})
+@user_namespace.route("/cache")
+class UserCacheApi(Resource):
+    """Restful API to inspect the users cache."""
+
+    def get(self):
+        """Get the hit/miss counters of the users cache."""
+        return user_cache.stats(), 200
+
+
+@user_namespace.doc(
+    responses={200: "OK"},
+    params={"userId": "User unique id"},
+)
+@user_namespace.route("/status")
+class UserStatusApi(Resource):
+    """Restful API to check the background statistics of a user."""
+
+    def get(self):
+        """GET endpoint that tells if the user statistics are fresh.
+
+        Returns
+        -------
+        dict
+            {"state": state, "job": job}, state being ``pending`` while a
+            PUT with async=true is queued or running, ``fresh`` when the last
+            one finished, ``failed`` when it failed, or ``unknown`` when this
+            instance did not run any for the user.
+        int
+            Response Code
+        """
+        job = statistics_jobs.latest(request.args.get("userId", None))
+        if job is None:
+            return {"state": "unknown", "job": None}, 200
+
+        data = job.to_dict()
+        if job.pending:
+            state = "pending"
+        elif job.status == "done" and job.result[1] == 200:
+            state = "fresh"
+        else:
+            state = "failed"
+            if job.status == "done":
+                data["error"] = job.result[0]
+
+        return {"state": state, "job": data}, 200
@@ -0,0 +1,136 @@
+"""Generator of synthetic ``people/me/connections`` payloads.
+
+The payloads mimic real address books: a few popular domains, companies and
+cities plus a long tail of unique ones, and contacts missing names, emails,
+organizations, addresses or photos.
+"""
+import random
+
+POPULAR_DOMAINS = ["gmail.com", "hotmail.com", "outlook.com", "yahoo.com"]
+POPULAR_ORGANIZATIONS = ["Google", "Conecta Nuvem", "Facebook", "Amazon"]
+POPULAR_CITIES = [
+    ("São Paulo", "SP"),
+    ("Rio de Janeiro", "RJ"),
+    ("Campinas", "SP"),
+    ("Belo Horizonte", "MG"),
+]
+JOBS = ["Developer", "Manager", "Designer", "Analyst", "Director", "Intern"]
+
+
+def _pick(rng, popular, tail_prefix, tail_ratio, index):
+    """Pick a popular value or, with tail_ratio chance, a unique one."""
+    if rng.random() < tail_ratio:
+        return "{} {}".format(tail_prefix, index)
+    return rng.choice(popular)
+
+
+def generate_connection(rng, index):
+    """Generate a single connection, as returned by the People API.
+
+    Parameters
+    ----------
+    rng : random.Random
+        Random generator, seeded for reproducible payloads.
+    index : int
+        Connection index, used in ids and unique values.
+
+    Returns
+    -------
+    dict
+        One People API person.
+
+    """
+    connection = {
+        "resourceName": "people/c{}".format(index),
+        "etag": "%EgUBAgMuNxoEAQIFByIMR{}".format(index),
+    }
+
+    if rng.random() < 0.9:
+        connection["names"] = [{"displayName": "Contact {}".format(index)}]
+
+    if rng.random() < 0.85:
+        domain = _pick(rng, POPULAR_DOMAINS, "company", 0.4, index % 5000)
+        domain = domain if "." in domain else domain.replace(" ", "") + ".com"
+        connection["emailAddresses"] = [
+            {"value": "user{}@{}".format(index, domain)}
+        ]
+
+    if rng.random() < 0.6:
+        connection["photos"] = [
+            {"url": "https://lh3.googleusercontent.com/a/{}".format(index)}
+        ]
+
+    if rng.random() < 0.5:
+        connection["organizations"] = [
+            {
+                "name": _pick(
+                    rng, POPULAR_ORGANIZATIONS, "Organization", 0.5, index
+                ),
+                "title": rng.choice(JOBS),
+            }
+        ]
+
+    if rng.random() < 0.4:
+        if rng.random() < 0.3:
+            city, region = "City {}".format(index), "Region {}".format(
+                index % 300
+            )
+        else:
+            city, region = rng.choice(POPULAR_CITIES)
+        connection["addresses"] = [{"city": city, "region": region}]
+
+    return connection
+
+
+def generate_connections(size, seed=42):
+    """Generate a list of connections.
+
+    Parameters
+    ----------
+    size : int
+        Number of connections.
+    seed : int
+        Random seed, the same seed gives the same payload.
+
+    Returns
+    -------
+    List[dict]
+        People API persons.
+
+    """
+    rng = random.Random(seed)
+    return [generate_connection(rng, index) for index in range(size)]
+
+
+def generate_pages(size, page_size=1000, seed=42):
+    """Generate the pages of a ``people/me/connections`` listing.
+
+    Parameters
+    ----------
+    size : int
+        Number of connections.
+    page_size : int
+        Connections per page.
+    seed : int
+        Random seed.
+
+    Returns
+    -------
+    List[dict]
+        Page bodies, chained by nextPageToken.
+
+    """
+    connections = generate_connections(size, seed)
+    pages = []
+
+    for offset in range(0, max(size, 1), page_size):
+        page = {
+            "connections": connections[offset:offset + page_size],
+            "totalPeople": size,
+            "totalItems": size,
+        }
+        if offset + page_size < size:
+            page["nextPageToken"] = str(offset + page_size)
+        pages.append(page)
+
+    return pages
@@ -0,0 +1,449 @@
+"""Benchmark suite of the contact processing hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 100000 \
+        --output bench.json
+    python -m benchmarks.run_benchmarks --compare bench.json
+
+Every benchmark reports the median and best time, the throughput in
+contacts per second and the peak memory allocated, as json, so the results
+of two commits can be compared.
+"""
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from api.codec.compression import available_encodings
+from api.codec.json_codec import available_codecs, get_codec
+from api.models.ContactData import ContactData
+from api.models.Statistics import ContactStatistics
+from api.models.User import User
+from api.search.contact_index import ContactIndex
+from api.reports.report_writer import (
+    REPORT_COLUMNS,
+    REPORT_HEADERS,
+    get_writer_class,
+)
+from api.sync.fake_people import project_person
+from api.upstream.person_fields import person_fields_mask
+from benchmarks.payloads import generate_connections
+
+BENCHMARKS = {}
+
+# personFields mask of each code path, see person_fields_mask
+PATH_MASKS = OrderedDict(
+    [
+        ("contact", person_fields_mask()),
+        ("report", person_fields_mask(REPORT_COLUMNS)),
+        (
+            "statistics",
+            person_fields_mask(
+                ContactStatistics.required_fields(
+                    ContactStatistics.USER_DIMENSIONS
+                )
+            ),
+        ),
+    ]
+)
+
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The decorated function receives the prepared inputs of a size and
+    returns the callable to be timed.
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+def prepare(size):
+    """Build the inputs shared by the benchmarks of a size."""
+    payload = {"connections": generate_connections(size)}
+    contacts = ContactData.multiples_json_contacts_to_objects(payload)
+    counts = ContactStatistics.count(
+        contacts, ContactStatistics.USER_DIMENSIONS
+    )
+    user = {
+        "contacts_statistics": {
+            name: value["contacts"] for name, value in counts.items()
+        }
+    }
+    grouped = ContactData.group_by_email_group(contacts)
+    by_id = {contact["id"]: contact for contact in contacts["contacts"]}
+    return {
+        "payload": payload,
+        "contacts": contacts,
+        "user": user,
+        # People API bodies come indented
+        "upstream_body": json.dumps(payload, indent=2).encode("utf-8"),
+        "grouped": grouped,
+        "by_id": by_id,
+        "index": ContactIndex(by_id),
+        "response_body": get_codec().dumps(grouped),
+        "path_bodies": {
+            path: json.dumps(
+                {
+                    "connections": [
+                        project_person(c, mask) for c in payload["connections"]
+                    ]
+                },
+                indent=2,
+            ).encode("utf-8")
+            for path, mask in PATH_MASKS.items()
+        },
+    }
+
+
+@benchmark("multiples_json_contacts_to_objects")
+def _normalize(inputs):
+    return lambda: ContactData.multiples_json_contacts_to_objects(
+        inputs["payload"]
+    )
+
+
+@benchmark("group_by_email_group")
+def _group(inputs):
+    return lambda: ContactData.group_by_email_group(inputs["contacts"])
+
+
+@benchmark("group_by.city")
+def _group_city(inputs):
+    return lambda: ContactData.group_by(
+        inputs["contacts"]["contacts"], ContactData._get_city
+    )
+
+
+@benchmark("rank_groups.sorted")
+def _rank_sorted(inputs):
+    return lambda: ContactData.rank_groups(inputs["grouped"]["contacts"])
+
+
+@benchmark("rank_groups.top_10")
+def _rank_top(inputs):
+    return lambda: ContactData.rank_groups(
+        inputs["grouped"]["contacts"], top=10
+    )
+
+
+for _name, _method in [
+    ("get_quantity_per_domain", ContactData.get_quantity_per_domain),
+    (
+        "get_quantity_per_organization",
+        ContactData.get_quantity_per_organization,
+    ),
+    ("get_quantity_per_job", ContactData.get_quantity_per_job),
+    ("get_quantity_per_city", ContactData.get_quantity_per_city),
+    ("get_quantity_per_region", ContactData.get_quantity_per_region),
+]:
+    benchmark(_name)(
+        lambda inputs, method=_method: lambda: method(inputs["contacts"])
+    )
+
+
+@benchmark("ContactStatistics.count")
+def _count(inputs):
+    return lambda: ContactStatistics.count(
+        inputs["contacts"], ContactStatistics.USER_DIMENSIONS
+    )
+
+
+@benchmark("User.statistics_to_chart")
+def _chart(inputs):
+    return lambda: User.statistics_to_chart(inputs["user"])
+
+
+def _report(report_format):
+    def setup(inputs):
+        writer_class = get_writer_class(report_format)
+
+        def run():
+            stream = io.BytesIO()
+            writer = writer_class(stream, REPORT_HEADERS)
+            for contact in inputs["contacts"]["contacts"]:
+                writer.write_row([contact[c] for c in REPORT_COLUMNS])
+            writer.close()
+            return stream
+
+        return run
+
+    return setup
+
+
+for _format in ("xls", "csv", "xlsx", "parquet"):
+    if get_writer_class(_format) is not None:
+        benchmark("report_writer." + _format)(_report(_format))
+
+
+@benchmark("json_decode.text_json_loads")
+def _decode_text(inputs):
+    return lambda: json.loads(inputs["upstream_body"].decode("utf-8"))
+
+
+@benchmark("json_encode.flask_restplus")
+def _encode_restplus(inputs):
+    # What the default application/json representation sends
+    return lambda: (json.dumps(inputs["grouped"]) + "\n").encode("utf-8")
+
+
+def _decode(codec):
+    return lambda inputs: lambda: codec.loads(inputs["upstream_body"])
+
+
+def _encode(codec):
+    return lambda inputs: lambda: codec.dumps(inputs["grouped"])
+
+
+for _codec in map(get_codec, available_codecs()):
+    benchmark("json_decode." + _codec.name)(_decode(_codec))
+    benchmark("json_encode." + _codec.name)(_encode(_codec))
+
+
+for _encoding, _compress in available_encodings():
+    benchmark("compress." + _encoding)(
+        lambda inputs, compress=_compress: lambda: compress(
+            inputs["response_body"]
+        )
+    )
+
+
+@benchmark("search_index.build")
+def _index_build(inputs):
+    return lambda: ContactIndex(inputs["by_id"])
+
+
+@benchmark("search_index.update_100")
+def _index_update(inputs):
+    removed = list(inputs["by_id"].values())[::97][:100]
+    added = [
+        dict(contact, name="Renamed " + contact["id"]) for contact in removed
+    ]
+    contacts = dict(inputs["by_id"])
+    contacts.update((contact["id"], contact) for contact in added)
+    return lambda: inputs["index"].apply_delta(removed, added, contacts)
+
+
+for _name, _query, _filters in [
+    # "contact" comeca o nome de 90% dos contatos
+    ("search.common_prefix", "contact", None),
+    ("search.name", "contact 4242", None),
+    ("search.email_prefix", "user42", None),
+    ("search.domain_filter", "gmail", {"city": "Campinas"}),
+]:
+    benchmark(_name)(
+        lambda inputs, query=_query, filters=_filters: lambda: inputs[
+            "index"
+        ].search(query, filters, limit=100)
+    )
+
+
+def _fetch_parse(path):
+    codec = get_codec()
+
+    def setup(inputs):
+        body = inputs["path_bodies"][path]
+
+        def run():
+            ContactData.multiples_json_contacts_to_objects(codec.loads(body))
+            # The size reported is the one of the upstream body
+            return body
+
+        return run
+
+    return setup
+
+
+for _path in PATH_MASKS:
+    benchmark("fetch_parse." + _path)(_fetch_parse(_path))
+
+
+def measure(run, repeat):
+    """Time run and measure its peak memory.
+
+    Parameters
+    ----------
+    run : Callable
+        Benchmarked callable.
+    repeat : int
+        Timed runs, the memory is measured in an extra traced run.
+
+    Returns
+    -------
+    dict
+        median and min seconds, peak allocated bytes, and the size of the
+        output when run returns ``bytes``.
+
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    output = run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "peak_bytes": peak,
+    }
+    if isinstance(output, bytes):
+        result["output_bytes"] = len(output)
+    return result
+
+
+def _git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode()
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, repeat, names=None):
+    """Run the registered benchmarks for each size.
+
+    Parameters
+    ----------
+    sizes : List[int]
+        Connections in the synthetic address books.
+    repeat : int
+        Timed runs of each benchmark.
+    names : List[str]
+        Run only these benchmarks.
+
+    Returns
+    -------
+    dict
+        {"meta": {...}, "results": [{"name", "size", ...}, ...]}
+
+    """
+    results = []
+
+    for size in sizes:
+        inputs = prepare(size)
+        for name, setup in BENCHMARKS.items():
+            if names and name not in names:
+                continue
+            result = measure(setup(inputs), repeat)
+            result["name"] = name
+            result["size"] = size
+            result["contacts_per_second"] = (
+                size / result["median_seconds"]
+                if result["median_seconds"]
+                else None
+            )
+            results.append(result)
+            print(
+                "{:<40} {:>7} {:>10.4f}s {:>12.0f}/s {:>8.1f} MB {}".format(
+                    name,
+                    size,
+                    result["median_seconds"],
+                    result["contacts_per_second"] or 0,
+                    result["peak_bytes"] / 2 ** 20,
+                    "{:>10.1f} KB out".format(result["output_bytes"] / 1024)
+                    if "output_bytes" in result
+                    else "",
+                ),
+                file=sys.stderr,
+            )
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print the time ratio of each benchmark against a baseline.
+
+    Returns
+    -------
+    List[str]
+        Benchmarks slower than the baseline by more than threshold.
+
+    """
+    old = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+
+    for result in current["results"]:
+        before = old.get((result["name"], result["size"]), None)
+        if before is None or not before["median_seconds"]:
+            continue
+        ratio = result["median_seconds"] / before["median_seconds"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "REGRESSION"
+            regressions.append("{}@{}".format(result["name"], result["size"]))
+        print(
+            "{:<40} {:>7} {:>7.2f}x {}".format(
+                result["name"], result["size"], ratio, flag
+            )
+        )
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="benchmark names to run")
+    parser.add_argument("--output", help="write the json results here")
+    parser.add_argument("--compare", help="baseline json to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown ratio reported as regression",
+    )
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(args.sizes, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""Startup time report of the api, from ``python -X importtime``.
+
+Run from the repository root:
+
+    python -m benchmarks.startup_time --output startup.json
+    python -m benchmarks.startup_time --compare startup.json
+
+The module gunicorn loads is imported in fresh interpreters, and the report
+gives the median import time, the time spent in each top level package and
+which of the lazily loaded dependencies were imported anyway.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from benchmarks.run_benchmarks import _git_commit
+
+# Dependencies that must only be imported on first use, see GET /_ah/warmup
+LAZY_MODULES = (
+    "fireo",
+    "google.cloud.firestore",
+    "firebase_admin.storage",
+    "google.cloud.storage",
+    "xlwt",
+    "xlsxwriter",
+    "pyarrow",
+    "httpx",
+)
+
+
+def import_times(module):
+    """Import a module in a new interpreter and parse ``-X importtime``.
+
+    Parameters
+    ----------
+    module : str
+        Module to import, like ``main``.
+
+    Returns
+    -------
+    List[tuple]
+        (name, self seconds, cumulative seconds, depth) of every module
+        imported, in the order they finished.
+
+    """
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        universal_newlines=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(process.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append(
+            (name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6, depth)
+        )
+    return modules
+
+
+def summarize(modules, top):
+    """Summarize one import, see ``import_times``.
+
+    Returns
+    -------
+    dict
+        {"total_seconds", "packages": {package: seconds}, "slowest":
+        [{"name", "cumulative_seconds"}], "lazy_imported": [...]}
+
+    """
+    # O primeiro nivel de indentacao sao os imports do proprio modulo
+    depth = min(d for _, _, _, d in modules)
+    packages = defaultdict(float)
+    for name, self_seconds, _, _ in modules:
+        packages[name.split(".")[0]] += self_seconds
+    names = {name for name, _, _, _ in modules}
+
+    return {
+        "total_seconds": sum(c for _, _, c, d in modules if d == depth),
+        "packages": dict(
+            sorted(packages.items(), key=lambda p: p[1], reverse=True)[:top]
+        ),
+        "slowest": [
+            {"name": name, "cumulative_seconds": cumulative}
+            for name, _, cumulative, _ in sorted(
+                modules, key=lambda m: m[2], reverse=True
+            )[:top]
+        ],
+        "lazy_imported": [m for m in LAZY_MODULES if m in names],
+    }
+
+
+def run_startup(module, repeat, top=15):
+    """Measure the import of a module ``repeat`` times.
+
+    The first import, which may compile the bytecode, is not counted. The
+    breakdown reported is the one of the median run.
+
+    Returns
+    -------
+    dict
+        {"meta": {...}, "module", "median_seconds", "min_seconds", ...}
+
+    """
+    import_times(module)
+    runs = sorted(
+        (summarize(import_times(module), top) for _ in range(repeat)),
+        key=lambda run: run["total_seconds"],
+    )
+    result = runs[len(runs) // 2]
+    totals = [run["total_seconds"] for run in runs]
+
+    print(
+        "{:<40} {:>10.4f}s median {:>10.4f}s min".format(
+            module, statistics.median(totals), min(totals)
+        ),
+        file=sys.stderr,
+    )
+    for package, seconds in result["packages"].items():
+        print("  {:<38} {:>10.4f}s".format(package, seconds), file=sys.stderr)
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "date": datetime.now(timezone.utc).isoformat(),
+            "repeat": repeat,
+        },
+        "module": module,
+        "median_seconds": statistics.median(totals),
+        "min_seconds": min(totals),
+        "packages": result["packages"],
+        "slowest": result["slowest"],
+        "lazy_imported": result["lazy_imported"],
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print the startup time ratio against a baseline.
+
+    Returns
+    -------
+    List[str]
+        The regressions: a slower startup than the baseline by more than
+        threshold, and lazy dependencies that are now imported at startup.
+
+    """
+    regressions = []
+
+    ratio = current["median_seconds"] / baseline["median_seconds"]
+    flag = ""
+    if ratio > 1 + threshold:
+        flag = "REGRESSION"
+        regressions.append(current["module"])
+    print("{:<40} {:>7.2f}x {}".format(current["module"], ratio, flag))
+
+    for module in current["lazy_imported"]:
+        if module not in baseline["lazy_imported"]:
+            print("{:<40} imported at startup REGRESSION".format(module))
+            regressions.append(module)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--module", default="main", help="module to import")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="write the json results here")
+    parser.add_argument("--compare", help="baseline json to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown ratio reported as regression",
+    )
+    args = parser.parse_args(argv)
+
+    current = run_startup(args.module, args.repeat, args.top)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+    else:
+        json.dump(current, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), current, args.threshold)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+"""Gunicorn settings, see the Configuration section of the README."""
+import os
+
+bind = ":" + os.getenv("PORT", "8080")
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+# sync, gthread or gevent. With gevent, each request waiting on the People
+# API, Firestore or Storage yields its worker to the other ones
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+threads = int(os.getenv("GUNICORN_THREADS", "1"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "100"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+
+def post_fork(server, worker):
+    if worker_class == "gevent":
+        # Firestore and Storage talk grpc, which must also yield to gevent
+        from grpc.experimental import gevent as grpc_gevent
+
+        grpc_gevent.init_gevent()
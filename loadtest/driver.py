@@ -0,0 +1,224 @@
+"""Load driver reporting p50/p95/p99 latency per endpoint.
+
+    python -m loadtest.driver --base-url http://localhost:5000/api \
+        --token fake-token --concurrency 16 --duration 60 \
+        --endpoints contact=5 contact_batch=2 report=1
+
+Each worker thread picks an endpoint by weight, times the request and
+records its status. The summary is printed as a table and, with --output,
+written as json.
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+
+def _percentile(values, percent):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def build_endpoints(args):
+    """Return the requests the driver knows, by name.
+
+    Each entry is (method, path, params, json body).
+    """
+    person_ids = ",".join("c{}".format(i) for i in range(args.batch_size))
+    return {
+        "contact": ("GET", "/contact/", {}, None),
+        "contact_detail": ("GET", "/contact/", {"personId": "c1"}, None),
+        "contact_batch": ("GET", "/contact/", {"personIds": person_ids}, None),
+        "user_get": ("GET", "/user/", {"userId": args.user_id}, None),
+        "user_put": (
+            "PUT",
+            "/user/",
+            {},
+            {"user_id": args.user_id, "user_name": "Load Test"},
+        ),
+        "report": ("GET", "/report/", {"sync": "true"}, None),
+        "report_async": ("GET", "/report/", {}, None),
+        "metrics": ("GET", "/metrics", {}, None),
+    }
+
+
+class LoadDriver:
+    """Send weighted requests from several threads and record latencies.
+
+    Attributes
+    ----------
+    base_url : str
+        Api root, like ``http://localhost:5000/api``.
+    token : str
+        Sent in the authorization-code header.
+    endpoints : dict
+        name to (method, path, params, body).
+    weights : dict
+        name to relative weight.
+
+    """
+
+    def __init__(self, base_url, token, endpoints, weights):
+        self.base_url = base_url.rstrip("/")
+        self.token = token
+        self.endpoints = endpoints
+        self.weights = weights
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def _worker(self, deadline, remaining):
+        session = requests.Session()
+        names = list(self.weights)
+        weights = [self.weights[name] for name in names]
+        rng = random.Random()
+
+        while time.monotonic() < deadline:
+            if remaining is not None:
+                with self._lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+
+            name = rng.choices(names, weights)[0]
+            method, path, params, body = self.endpoints[name]
+            url = self.base_url + path
+            if path == "/metrics":
+                url = self.base_url.rsplit("/api", 1)[0] + path
+
+            start = time.perf_counter()
+            try:
+                r = session.request(
+                    method,
+                    url,
+                    params=params,
+                    json=body,
+                    headers={"authorization-code": self.token},
+                    timeout=120,
+                )
+                status = r.status_code
+            except requests.exceptions.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+
+            with self._lock:
+                self.latencies[name].append(elapsed)
+                self.statuses[name][status] += 1
+
+    def run(self, concurrency, duration, requests_count=None):
+        """Run the workers and return the summary.
+
+        Parameters
+        ----------
+        concurrency : int
+            Worker threads.
+        duration : float
+            Seconds to run.
+        requests_count : int
+            Stop after this many requests, if given.
+
+        Returns
+        -------
+        dict
+            Per endpoint count, rps, statuses and p50/p95/p99/max seconds.
+
+        """
+        deadline = time.monotonic() + duration
+        remaining = [requests_count] if requests_count else None
+        started = time.monotonic()
+
+        threads = [
+            threading.Thread(target=self._worker, args=(deadline, remaining))
+            for _ in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        elapsed = time.monotonic() - started
+        summary = {}
+        for name, values in self.latencies.items():
+            summary[name] = {
+                "count": len(values),
+                "rps": len(values) / elapsed if elapsed else None,
+                "statuses": {str(k): v for k, v in self.statuses[name].items()},
+                "mean": statistics.mean(values),
+                "p50": _percentile(values, 50),
+                "p95": _percentile(values, 95),
+                "p99": _percentile(values, 99),
+                "max": max(values),
+            }
+        return summary
+
+
+def print_summary(summary, file=sys.stdout):
+    """Print the summary as a table, latencies in milliseconds."""
+    print(
+        "{:<16} {:>7} {:>8} {:>9} {:>9} {:>9}  statuses".format(
+            "endpoint", "count", "rps", "p50 ms", "p95 ms", "p99 ms"
+        ),
+        file=file,
+    )
+    for name, row in sorted(summary.items()):
+        print(
+            "{:<16} {:>7} {:>8.1f} {:>9.1f} {:>9.1f} {:>9.1f}  {}".format(
+                name,
+                row["count"],
+                row["rps"] or 0,
+                row["p50"] * 1000,
+                row["p95"] * 1000,
+                row["p99"] * 1000,
+                row["statuses"],
+            ),
+            file=file,
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:5000/api")
+    parser.add_argument("--token", default="fake-token")
+    parser.add_argument("--user-id", default="load-test-user")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--requests", type=int, help="stop after N requests")
+    parser.add_argument(
+        "--endpoints",
+        nargs="+",
+        default=["contact=1"],
+        help="name=weight, names: contact, contact_detail, contact_batch, "
+        "user_get, user_put, report, report_async, metrics",
+    )
+    parser.add_argument("--output", help="write the json summary here")
+    args = parser.parse_args(argv)
+
+    endpoints = build_endpoints(args)
+    weights = {}
+    for item in args.endpoints:
+        name, _, weight = item.partition("=")
+        if name not in endpoints:
+            parser.error("unknown endpoint " + name)
+        weights[name] = float(weight or 1)
+
+    driver = LoadDriver(args.base_url, args.token, endpoints, weights)
+    summary = driver.run(args.concurrency, args.duration, args.requests)
+
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""Local stand-in of the Google People API, for end-to-end load tests.
+
+It serves the connections listing (with pagination and sync tokens), the
+get-person and the batchGet calls over HTTP, backed by
+``api.sync.fake_people.FakePeopleUpstream`` and a synthetic address book:
+
+    python -m loadtest.fake_google --port 8081 --contacts 10000 \
+        --latency-ms 80 --jitter-ms 40 --error-rate 0.01 --throttle-rate 0.02
+
+The token ``invalid`` is always answered with 401. Point the api to it with
+``PEOPLE_API_URL=http://localhost:8081/v1``, or start both with
+``python -m loadtest.serve_api``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import deque
+
+from flask import Flask, Response, request
+
+from api.sync.fake_people import FakePeopleUpstream
+from benchmarks.payloads import generate_connection, generate_connections
+
+# Access token always answered with 401
+INVALID_TOKEN = "invalid"
+
+
+class FaultInjector:
+    """Delays and fails a share of the calls.
+
+    Attributes
+    ----------
+    latency : float
+        Fixed delay of each call, in seconds.
+    jitter : float
+        Random extra delay, up to this many seconds.
+    error_rate, unauthorized_rate, throttle_rate : float
+        Share of the calls answered with 500, 401 and 429.
+
+    """
+
+    def __init__(
+        self,
+        latency=0,
+        jitter=0,
+        error_rate=0,
+        unauthorized_rate=0,
+        throttle_rate=0,
+        seed=None,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.unauthorized_rate = unauthorized_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+
+    def fault(self):
+        """Sleep the configured latency and return a forced error, if any.
+
+        Returns
+        -------
+        tuple
+            (code, message, status) of the error to answer, or None.
+
+        """
+        time.sleep(self.latency + self._rng.random() * self.jitter)
+
+        draw = self._rng.random()
+        if draw < self.unauthorized_rate:
+            return (
+                401,
+                "Request had invalid authentication credentials.",
+                "UNAUTHENTICATED",
+            )
+        draw -= self.unauthorized_rate
+        if draw < self.throttle_rate:
+            return 429, "Quota exceeded.", "RESOURCE_EXHAUSTED"
+        draw -= self.throttle_rate
+        if draw < self.error_rate:
+            return 500, "Internal error encountered.", "INTERNAL"
+        return None
+
+
+def create_app(upstream, faults, max_page_size=1000):
+    """Create the fake People API flask app.
+
+    Parameters
+    ----------
+    upstream : FakePeopleUpstream
+        In-memory address book.
+    faults : FaultInjector
+        Latency and errors to inject.
+    max_page_size : int
+        Cap applied to the pageSize of connection listings.
+
+    Returns
+    -------
+    flask.Flask
+        The app.
+
+    """
+    app = Flask(__name__)
+    lock = threading.Lock()
+    rng = random.Random(0)
+
+    def answer(path, params):
+        fault = faults.fault()
+        if fault is not None:
+            return _error_response(*fault)
+
+        authorization = request.headers.get("Authorization", "")
+        token = authorization[len("Bearer "):]
+        if token == INVALID_TOKEN:
+            fault = 401, "Request had invalid authentication credentials."
+            return _error_response(fault[0], fault[1], "UNAUTHENTICATED")
+
+        with lock:
+            response = upstream.get(path, token, params)
+        return _json_response(response.status_code, response.text)
+
+    @app.route("/v1/people/me/connections")
+    def connections():
+        params = request.args.to_dict()
+        if "pageSize" in params:
+            params["pageSize"] = min(int(params["pageSize"]), max_page_size)
+        return answer("/people/me/connections", params)
+
+    @app.route("/v1/people:batchGet")
+    def batch_get():
+        params = request.args.to_dict()
+        params["resourceNames"] = request.args.getlist("resourceNames")
+        return answer("/people:batchGet", params)
+
+    @app.route("/v1/people/<person_id>")
+    def person(person_id):
+        return answer("/people/" + person_id, request.args.to_dict())
+
+    @app.route("/_fake/mutate", methods=["POST"])
+    def mutate():
+        """Add, change and delete random contacts, to exercise sync tokens."""
+        count = int(request.args.get("count", 10))
+        with lock:
+            names = list(upstream._connections)
+            for _ in range(count):
+                action = rng.random()
+                if action < 0.3 and names:
+                    upstream.delete(names.pop(rng.randrange(len(names))))
+                elif action < 0.6 and names:
+                    index = int(rng.choice(names).split("/c")[1])
+                    upstream.update(generate_connection(rng, index))
+                else:
+                    index = 10 ** 9 + upstream.version
+                    upstream.add(generate_connection(rng, index))
+        return {"version": upstream.version}
+
+    @app.route("/_fake/expire", methods=["POST"])
+    def expire():
+        """Expire every sync token, next delta calls answer 410."""
+        upstream.expire_sync_tokens()
+        return {"expired": True}
+
+    return app
+
+
+def _json_response(code, body):
+    return Response(body, status=code, mimetype="application/json")
+
+
+def _error_response(code, message, status):
+    return _json_response(
+        code,
+        json.dumps(
+            {"error": {"code": code, "message": message, "status": status}}
+        ),
+    )
+
+
+def build_upstream(contacts, seed=42):
+    """Create the in-memory address book with synthetic connections."""
+    upstream = FakePeopleUpstream(generate_connections(contacts, seed))
+    upstream.calls = deque(maxlen=1000)
+    return upstream
+
+
+def add_arguments(parser):
+    """Add the fake upstream options to an argument parser."""
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--max-page-size", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--unauthorized-rate", type=float, default=0)
+    parser.add_argument("--throttle-rate", type=float, default=0)
+
+
+def faults_from_args(args):
+    """Create the FaultInjector configured by the parsed arguments."""
+    return FaultInjector(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        unauthorized_rate=args.unauthorized_rate,
+        throttle_rate=args.throttle_rate,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--port", type=int, default=8081)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    app = create_app(
+        build_upstream(args.contacts), faults_from_args(args), args.max_page_size
+    )
+    app.run(host="0.0.0.0", port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
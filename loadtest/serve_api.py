@@ -0,0 +1,51 @@
+"""Run the api against the local fake People API and a fake bucket.
+
+    python -m loadtest.serve_api --port 5000 --contacts 10000 --latency-ms 80
+
+The report endpoint uploads to an in-memory ``FakeBucket``. The user
+endpoints still need Firestore, point them to the emulator with
+``FIRESTORE_EMULATOR_HOST`` and ``GOOGLE_CLOUD_PROJECT``.
+"""
+import argparse
+import os
+import threading
+
+from loadtest.fake_google import (
+    add_arguments,
+    build_upstream,
+    create_app,
+    faults_from_args,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--fake-port", type=int, default=8081)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    fake_app = create_app(
+        build_upstream(args.contacts), faults_from_args(args), args.max_page_size
+    )
+    threading.Thread(
+        target=fake_app.run,
+        kwargs={"port": args.fake_port, "threaded": True},
+        daemon=True,
+    ).start()
+
+    # The People client reads its url when first imported
+    os.environ["PEOPLE_API_URL"] = "http://127.0.0.1:{}/v1".format(
+        args.fake_port
+    )
+
+    from api.server import app
+    from api.reports.fake_storage import FakeBucket
+    from api.reports.report_writer import set_bucket
+
+    set_bucket(FakeBucket())
+    app.run(host="0.0.0.0", port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Shared fixtures, the api runs against the local fake People API."""
+import pytest
+
+# Como no main.py, o server importa os namespaces na ordem certa
+import api.server  # noqa: F401
+from api.contacts.contacts_api import contact_cache, token_owners
+from api.sync.fake_people import FakePeopleUpstream
+from api.sync.snapshot_store import snapshots
+from api.upstream.people_client import set_client
+
+
+def make_connection(index, email=True, organization="Org"):
+    """Return a People API person, like the ones of connections.list."""
+    connection = {
+        "resourceName": "people/c{}".format(index),
+        "names": [{"displayName": "Contact {}".format(index)}],
+        "organizations": [{"name": organization, "title": "Developer"}],
+        "addresses": [{"city": "Campinas", "region": "SP"}],
+    }
+    if email:
+        connection["emailAddresses"] = [
+            {"value": "user{}@domain{}.com".format(index, index % 3)}
+        ]
+    return connection
+
+
+@pytest.fixture
+def upstream():
+    """Install a fake People API with 25 contacts, 2 without email."""
+    fake = FakePeopleUpstream(
+        [make_connection(i, email=i not in (3, 7)) for i in range(25)]
+    )
+    set_client(fake)
+    yield fake
+    set_client(None)
+    snapshots.clear()
+    contact_cache.clear_local()
+    token_owners.clear_local()
@@ -0,0 +1,158 @@
+"""Tiered cache, in process and on the local Redis stand-in."""
+import pytest
+
+from api.cache import cache
+from api.cache.cache import (
+    FakeRedis,
+    MemoryCache,
+    RedisCache,
+    TieredCache,
+    build_cache,
+)
+
+
+class _Clock:
+    """Replaces the time module of the cache, moved by hand."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+def _tiered(max_bytes=1000, redis=None):
+    return TieredCache(
+        MemoryCache(max_bytes=max_bytes, default_ttl=30),
+        RedisCache(redis or FakeRedis(), default_ttl=30),
+    )
+
+
+def test_entries_expire_in_both_tiers(clock):
+    tiered = _tiered()
+    tiered.set("a", {"value": 1})
+    tiered.set("b", {"value": 2}, ttl=60)
+
+    clock.now += 29
+    assert tiered.get("a") == {"value": 1}
+    assert tiered.stats()["local"]["hits"] == 1
+
+    clock.now += 2
+    assert tiered.get("a") is None
+    assert tiered.get("b") == {"value": 2}
+    assert tiered.stats() == {
+        "local": {
+            "hits": 2,
+            "misses": 1,
+            "evictions": 0,
+            "entries": 1,
+            "bytes": len(b'{"value":2}'),
+        },
+        "shared": {"hits": 0, "misses": 1},
+    }
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    tiered = _tiered(max_bytes=3 * len(b'"xxxxxxxx"'))
+    for key in "abc":
+        tiered.set(key, "x" * 8)
+    assert tiered.get("a") == "x" * 8
+
+    tiered.set("d", "x" * 8)
+
+    local = tiered.local
+    assert local.stats()["evictions"] == 1
+    assert local.stats()["entries"] == 3
+    assert local.get("b") is None
+    assert local.get("a") == "x" * 8
+    # Ainda no Redis, volta para o processo no proximo get
+    assert tiered.get("b") == "x" * 8
+    assert tiered.shared.stats() == {"hits": 1, "misses": 0}
+    assert local.get("b") == "x" * 8
+
+
+def test_values_bigger_than_the_budget_stay_in_redis():
+    tiered = _tiered(max_bytes=10)
+
+    tiered.set("big", ["x" * 20])
+
+    assert tiered.local.stats()["entries"] == 0
+    assert tiered.get("big") == ["x" * 20]
+
+
+def test_shared_hit_fills_the_local_tier_of_another_worker():
+    redis = FakeRedis()
+    first, second = _tiered(redis=redis), _tiered(redis=redis)
+
+    first.set("a", {"value": 1})
+
+    assert second.get("a") == {"value": 1}
+    assert second.get("a") == {"value": 1}
+    assert second.stats()["local"]["hits"] == 1
+    assert second.stats()["shared"]["hits"] == 1
+
+    # Sem shared_only, o outro worker segue com a copia local
+    first.delete("a")
+    assert first.get("a") is None
+    assert second.get("a") == {"value": 1}
+
+
+@pytest.fixture
+def redis_url(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setattr(
+        RedisCache,
+        "from_url",
+        staticmethod(lambda url, **kwargs: RedisCache(redis, **kwargs)),
+    )
+    return redis
+
+
+def test_shared_only_skips_the_local_tier(redis_url):
+    first = build_cache("test", default_ttl=30, max_bytes=1000)
+    worker = build_cache(
+        "test", default_ttl=30, max_bytes=1000, shared_only=True
+    )
+    other = build_cache(
+        "test", default_ttl=30, max_bytes=1000, shared_only=True
+    )
+
+    assert first.local is not None
+    assert worker.local is None
+    worker.set("user", {"name": "old"})
+    assert other.get("user") == {"name": "old"}
+
+    worker.set("user", {"name": "new"})
+    assert other.get("user") == {"name": "new"}
+    worker.delete("user")
+    assert other.get("user") is None
+    assert other.stats() == {"shared": {"hits": 2, "misses": 1}}
+
+
+def test_missing_redis_package_keeps_the_cache_in_process(
+    monkeypatch, caplog
+):
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+
+    def from_url(url, **kwargs):
+        raise ImportError("No module named 'redis'")
+
+    monkeypatch.setattr(RedisCache, "from_url", staticmethod(from_url))
+
+    tiered = build_cache(
+        "test", default_ttl=30, max_bytes=1000, shared_only=True
+    )
+
+    assert tiered.shared is None
+    assert tiered.local is not None
+    tiered.set("a", 1)
+    assert tiered.get("a") == 1
+    assert "REDIS_URL is set" in caplog.text
@@ -0,0 +1,179 @@
+"""Search index over the contacts, incremental updates and ranking."""
+import random
+
+import pytest
+
+from api.models.Statistics import ContactStatistics
+from api.search import contact_index
+from api.search.contact_index import ContactIndex, get_index, indexes
+from api.server import app
+
+NAMES = ["Ana", "Andre", "Bruno", "Beatriz", "Carla", "Carlos", "Joao"]
+SURNAMES = ["Silva", "Souza", "Santos", "Sacilotti", "Oliveira"]
+CITIES = ["Campinas", "Santos", "Sorocaba"]
+
+QUERIES = [
+    ("an", None),
+    ("ana silva", None),
+    ("s", None),
+    ("domain1.com", None),
+    ("user1", None),
+    ("", {"city": "santos"}),
+    ("car", {"organization": "Org2", "region": "SP"}),
+    ("zz", None),
+]
+
+
+def _contact(rng, index):
+    return {
+        "id": "c{}".format(index),
+        "name": "{} {}".format(rng.choice(NAMES), rng.choice(SURNAMES)),
+        "photo_url": "",
+        "email": "user{}@domain{}.com".format(index, rng.randrange(4)),
+        "job": "Developer",
+        "organization": "Org{}".format(rng.randrange(3)),
+        "region": rng.choice(["SP", "RJ"]),
+        "city": rng.choice(CITIES),
+    }
+
+
+def _contacts(rng, count):
+    return {
+        contact["id"]: contact
+        for contact in (_contact(rng, i) for i in range(count))
+    }
+
+
+def _changed(rng, contacts):
+    current = dict(contacts)
+    ids = sorted(current)
+    for contact_id in ids[:10]:
+        del current[contact_id]
+    for contact_id in ids[10:25]:
+        current[contact_id] = _contact(rng, int(contact_id[1:]))
+    for index in range(1000, 1020):
+        contact = _contact(rng, index)
+        current[contact["id"]] = contact
+    return current
+
+
+@pytest.fixture
+def clear_indexes():
+    yield
+    indexes.clear()
+
+
+def test_delta_matches_a_full_rebuild():
+    rng = random.Random(3)
+    previous = _contacts(rng, 200)
+    index = ContactIndex(previous)
+
+    for _ in range(5):
+        current = _changed(rng, previous)
+        removed, added = ContactStatistics.diff(previous, current)
+
+        updated = index.apply_delta(removed, added, current)
+        rebuilt = ContactIndex(current)
+
+        assert updated._terms == rebuilt._terms
+        assert updated._filters == rebuilt._filters
+        for query, filters in QUERIES:
+            assert updated.search(query, filters) == rebuilt.search(
+                query, filters
+            )
+            assert updated.search(query, filters, 5) == rebuilt.search(
+                query, filters, 5
+            )
+        # O indice anterior continua valendo para quem ainda o usa
+        assert index.search("an") == ContactIndex(previous).search("an")
+        index, previous = updated, current
+
+
+def test_exact_and_name_matches_rank_first():
+    contacts = {
+        "c1": {
+            "id": "c1",
+            "name": "Anabela Costa",
+            "email": "ana@x.com",
+            "organization": "Org",
+            "region": "SP",
+            "city": "Campinas",
+        },
+        "c2": {
+            "id": "c2",
+            "name": "Ana Souza",
+            "email": "souza@x.com",
+            "organization": "Org",
+            "region": "SP",
+            "city": "Campinas",
+        },
+        "c3": {
+            "id": "c3",
+            "name": "Bruno Lima",
+            "email": "analista@x.com",
+            "organization": "Org",
+            "region": "SP",
+            "city": "Santos",
+        },
+    }
+
+    found, total = ContactIndex(contacts).search("ana")
+
+    assert total == 3
+    # Nome exato (4), prefixo do nome (3), so prefixo do email (1)
+    assert [contact["id"] for contact in found] == ["c2", "c1", "c3"]
+    found, total = ContactIndex(contacts).search("ana", {"city": "SANTOS"})
+    assert ([contact["id"] for contact in found], total) == (["c3"], 1)
+
+
+def test_small_changes_update_the_stored_index(monkeypatch, clear_indexes):
+    rng = random.Random(5)
+    contacts = _contacts(rng, 100)
+    calls = []
+    apply_delta = ContactIndex.apply_delta
+
+    def spy(self, removed, added, current):
+        calls.append(len(removed) + len(added))
+        return apply_delta(self, removed, added, current)
+
+    monkeypatch.setattr(ContactIndex, "apply_delta", spy)
+
+    first = get_index("key", contacts)
+    assert get_index("key", contacts) is first
+
+    current = dict(contacts)
+    current["c1"] = _contact(rng, 1)
+    second = get_index("key", current)
+
+    assert calls == [2]
+    assert second.contacts is current
+    assert second._terms == ContactIndex(current)._terms
+
+    # Acima de REBUILD_RATIO da agenda, o indice e refeito do zero
+    monkeypatch.setattr(contact_index, "REBUILD_RATIO", 0.01)
+    current = dict(current)
+    current["c2"] = _contact(rng, 2)
+    current["c3"] = _contact(rng, 3)
+    third = get_index("key", current)
+
+    assert calls == [2]
+    assert third._terms == ContactIndex(current)._terms
+    assert indexes.get("key") is third
+
+
+def test_search_without_query_nor_filters(upstream, clear_indexes):
+    client = app.test_client()
+    headers = {"authorization-code": "token"}
+
+    response = client.get("/api/contact/search?q=%20", headers=headers)
+    assert response.status_code == 471
+    assert response.get_json() == {"error": "Missing search query or filters"}
+
+    response = client.get(
+        "/api/contact/search?q=contact%201&fields=name", headers=headers
+    )
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["contacts"][0] == {"id": "c1", "name": "Contact 1"}
+    # "1" casa com Contact 1 e com Contact 10 a 19, cujo nome comeca com 1
+    assert body["total"] == 11
@@ -0,0 +1,153 @@
+"""Incremental sync of the contact snapshots, against the fake People API."""
+from api.ApiCodes import INVALID_CREDENTIALS
+from api.contacts.contacts_api import ContactApi, contact_cache
+from api.sync.fake_people import FakePeopleUpstream
+from api.sync.snapshot_store import snapshot_key, snapshots
+from api.upstream.people_client import set_client
+from api.upstream.person_fields import FULL_PERSON_FIELDS
+
+from conftest import make_connection
+
+
+def _sync(token="token-1"):
+    snapshot, code = ContactApi()._sync_contacts(token, page_size=10)
+    assert code == 200
+    return snapshot
+
+
+def _listings(upstream):
+    return [
+        params
+        for path, params in upstream.calls
+        if path == "/people/me/connections"
+    ]
+
+
+def test_full_sync_walks_every_page(upstream):
+    snapshot = _sync()
+
+    assert len(_listings(upstream)) == 3
+    assert "syncToken" not in _listings(upstream)[0]
+    # Contacts without email are left out
+    assert sorted(snapshot.contacts) == sorted(
+        "c{}".format(i) for i in range(25) if i not in (3, 7)
+    )
+    assert snapshot.sync_token is not None
+    assert snapshot.contacts["c1"]["email"] == "user1@domain1.com"
+
+
+def test_delta_sync_applies_changes(upstream):
+    first = _sync()
+    upstream.calls.clear()
+
+    upstream.add(make_connection(30))
+    upstream.update(make_connection(1, organization="Changed"))
+    upstream.delete("people/c2")
+    upstream.update(make_connection(4, email=False))
+
+    second = _sync()
+
+    listings = _listings(upstream)
+    assert len(listings) == 1
+    assert listings[0]["syncToken"] == first.sync_token
+    assert second.version == first.version + 1
+    assert second.contacts["c30"]["email"] == "user30@domain0.com"
+    assert second.contacts["c1"]["organization"] == "Changed"
+    assert "c2" not in second.contacts
+    # Losing the email removes the contact
+    assert "c4" not in second.contacts
+    assert len(second.contacts) == len(first.contacts) - 1
+    assert second.contacts["c5"] is first.contacts["c5"]
+    # The previous snapshot is left untouched
+    assert first.contacts["c1"]["organization"] == "Org"
+
+
+def test_sync_without_changes_keeps_the_snapshot(upstream):
+    first = _sync()
+    second = _sync()
+
+    assert second.contacts is first.contacts
+    assert second.version == first.version
+
+
+def test_expired_sync_token_downloads_everything_again(upstream):
+    first = _sync()
+    upstream.delete("people/c0")
+    upstream.expire_sync_tokens()
+    upstream.calls.clear()
+
+    second = _sync()
+
+    listings = _listings(upstream)
+    assert listings[0]["syncToken"] == first.sync_token
+    assert all("syncToken" not in params for params in listings[1:])
+    assert len(listings) == 1 + 3
+    assert "c0" not in second.contacts
+    assert len(second.contacts) == len(first.contacts) - 1
+
+    upstream.calls.clear()
+    _sync()
+    assert len(_listings(upstream)) == 1
+
+
+def test_new_token_of_the_same_user_keeps_syncing(upstream):
+    first = _sync("token-1")
+    upstream.calls.clear()
+
+    second = _sync("token-2")
+
+    assert _listings(upstream)[0]["syncToken"] == first.sync_token
+    assert second.contacts is first.contacts
+    key = snapshot_key(upstream.owner, FULL_PERSON_FIELDS)
+    assert snapshots.get(key) is second
+
+
+def _masks(upstream):
+    return [params["personFields"] for params in _listings(upstream)]
+
+
+def test_narrow_fields_are_projected_from_the_full_contacts(upstream):
+    full, _ = ContactApi()._get_list_of_contacts(grouped=False, token="t")
+    upstream.calls.clear()
+
+    narrow, code = ContactApi()._get_list_of_contacts(
+        grouped=False, token="t", fields=["email", "city"]
+    )
+
+    assert code == 200
+    assert _listings(upstream) == []
+    assert len(narrow["contacts"]) == len(full["contacts"])
+    contact = narrow["contacts"][0]
+    assert contact["email"] == full["contacts"][0]["email"]
+    assert contact["city"] == "Campinas"
+    assert contact["name"] == "Missin Name"
+    assert contact["job"] == "Missing"
+
+    # Expired from the cache, the full snapshot is synced instead
+    contact_cache.clear_local()
+    upstream.update(make_connection(1, organization="Changed"))
+
+    narrow, _ = ContactApi()._get_list_of_contacts(
+        grouped=False, token="t", fields=["organization"]
+    )
+
+    assert _masks(upstream) == [FULL_PERSON_FIELDS]
+    assert "syncToken" in _listings(upstream)[0]
+    assert {c["organization"] for c in narrow["contacts"]} == {
+        "Org",
+        "Changed",
+    }
+
+
+def test_narrow_fields_are_fetched_alone_without_full_contacts(upstream):
+    ContactApi()._get_list_of_contacts(
+        grouped=False, token="t", fields=["email", "city"]
+    )
+
+    assert set(_masks(upstream)) == {"emailAddresses,addresses"}
+
+
+def test_invalid_token(upstream):
+    set_client(FakePeopleUpstream([make_connection(1)], token="valid"))
+
+    assert ContactApi()._sync_contacts("other") == INVALID_CREDENTIALS
@@ -0,0 +1,94 @@
+"""Deduplication and per key serialization of the background jobs."""
+import threading
+import time
+
+import pytest
+
+from api.jobs.job_pool import JobPool, QueueFull
+
+TIMEOUT = 5
+
+
+def _wait_done(*jobs):
+    for job in jobs:
+        for _ in range(TIMEOUT * 100):
+            if not job.pending:
+                break
+            time.sleep(0.01)
+        assert not job.pending
+
+
+class _Blocker:
+    """Job function that runs until released."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, value=None):
+        self.started.set()
+        assert self.release.wait(TIMEOUT)
+        return value
+
+
+def test_queued_key_collapses():
+    pool = JobPool(1, 4)
+    blocker = _Blocker()
+    busy = pool.submit(blocker)
+    assert blocker.started.wait(TIMEOUT)
+
+    first = pool.submit(str, 1, key="user")
+    second = pool.submit(str, 2, key="user")
+
+    assert second is first
+    assert pool.latest("user") is first
+    assert pool.stats()["pending"] == 2
+    blocker.release.set()
+    _wait_done(busy, first)
+    assert first.result == "1"
+
+
+def test_running_key_waits_for_the_running_job():
+    pool = JobPool(2, 4)
+    running = _Blocker()
+    first = pool.submit(running, "first", key="user")
+    assert running.started.wait(TIMEOUT)
+
+    follow_up = _Blocker()
+    second = pool.submit(follow_up, "second", key="user")
+    third = pool.submit(follow_up, "third", key="user")
+
+    assert third is second
+    assert pool.latest("user") is second
+    # Ha uma thread livre, mas a chave ainda esta rodando
+    assert not follow_up.started.wait(0.2)
+    assert second.status == "queued"
+
+    running.release.set()
+    assert follow_up.started.wait(TIMEOUT)
+    follow_up.release.set()
+    _wait_done(first, second)
+
+    assert second.started_at >= first.finished_at
+    assert (first.result, second.result) == ("first", "second")
+    assert pool.stats()["pending"] == 0
+
+    # Terminados, a chave volta a rodar direto
+    again = pool.submit(str, 3, key="user")
+    _wait_done(again)
+    assert again.result == "3"
+
+
+def test_queue_full():
+    pool = JobPool(1, 2)
+    blocker = _Blocker()
+    jobs = [pool.submit(blocker, key="user{}".format(i)) for i in range(3)]
+
+    with pytest.raises(QueueFull):
+        pool.submit(blocker, key="user3")
+    # Uma chave ja na fila nao ocupa outra vaga
+    assert pool.submit(blocker, key="user2") is jobs[2]
+
+    blocker.release.set()
+    _wait_done(*jobs)
+    assert pool.submit(str, key="user3").key == "user3"
@@ -0,0 +1,64 @@
+"""Reuse and pruning of the stored reports, on the fake bucket."""
+import io
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from google.api_core.exceptions import PreconditionFailed
+
+from api.reports import report_store
+from api.reports.fake_storage import FakeBucket
+from api.reports.report_store import find_report, prune_reports
+
+
+def _upload(bucket, name, size=10, age=0):
+    blob = bucket.blob(name)
+    blob.upload_from_file(io.BytesIO(b"x" * size))
+    blob.time_created = datetime.now(timezone.utc) - timedelta(seconds=age)
+    return blob
+
+
+def test_serving_a_report_refreshes_its_age():
+    bucket = FakeBucket()
+    blob = _upload(
+        bucket, "reports/a.csv", age=report_store.REPORT_MAX_AGE - 5
+    )
+
+    assert find_report(bucket, "reports/a.csv") is blob
+    assert blob.metageneration == 2
+    assert prune_reports(bucket, force=True) == 0
+    assert find_report(bucket, "reports/a.csv") is blob
+    # Servido de novo logo depois, a metadata nao e reescrita
+    assert blob.metageneration == 2
+
+
+def test_expired_report_is_not_served():
+    bucket = FakeBucket()
+    _upload(bucket, "reports/a.csv", age=report_store.REPORT_MAX_AGE + 1)
+
+    assert find_report(bucket, "reports/a.csv") is None
+    assert prune_reports(bucket, force=True) == 1
+    assert bucket.list_blobs() == []
+
+
+def test_size_budget_keeps_the_last_served_reports(monkeypatch):
+    monkeypatch.setattr(report_store, "REPORT_MAX_TOTAL_BYTES", 15)
+    bucket = FakeBucket()
+    served = _upload(bucket, "reports/old.csv", age=3 * 24 * 3600)
+    _upload(bucket, "reports/new.csv", age=24 * 3600)
+
+    find_report(bucket, "reports/old.csv")
+
+    assert prune_reports(bucket, force=True) == 1
+    assert bucket.list_blobs() == [served]
+
+
+def test_report_served_after_the_listing_is_not_deleted():
+    bucket = FakeBucket()
+    blob = _upload(bucket, "reports/a.csv", age=24 * 3600)
+    listed = blob.metageneration
+
+    find_report(bucket, "reports/a.csv")
+
+    with pytest.raises(PreconditionFailed):
+        blob.delete(if_metageneration_match=listed)
+    assert bucket.get_blob("reports/a.csv") is blob
@@ -0,0 +1,174 @@
+"""Report writers streaming into the fake Storage bucket."""
+import csv
+import io
+import zipfile
+
+import pytest
+
+from api.reports import report_writer
+from api.reports.fake_storage import FakeBucket
+from api.reports.report_writer import (
+    REPORT_HEADERS,
+    CsvReportWriter,
+    XlsReportWriter,
+    XlsxReportWriter,
+    get_writer_class,
+    open_upload_stream,
+)
+
+
+def _rows(count):
+    return [
+        [
+            "Contact {}".format(i),
+            "user{}@x.com".format(i),
+            "Dev",
+            "Org",
+            "SP",
+            "Campinas",
+        ]
+        for i in range(count)
+    ]
+
+
+def _write(blob, writer_class, rows):
+    stream = open_upload_stream(blob, writer_class.content_type)
+    writer = writer_class(stream, REPORT_HEADERS)
+    for row in rows:
+        writer.write_row(row)
+    writer.close()
+    stream.close()
+    return blob
+
+
+class _BlobWithoutOpen:
+    """Blob of a google-cloud-storage older than 1.38, without ``open``."""
+
+    def __init__(self, blob):
+        self._blob = blob
+
+    def upload_from_file(self, file_obj, content_type=None):
+        self._blob.upload_from_file(file_obj, content_type=content_type)
+
+
+def test_upload_is_sent_in_chunks(monkeypatch):
+    monkeypatch.setattr(report_writer, "CHUNK_SIZE", 256 * 1024)
+    bucket = FakeBucket()
+
+    blob = _write(bucket.blob("reports/a.csv"), CsvReportWriter, _rows(20000))
+
+    assert bucket.get_blob("reports/a.csv") is blob
+    assert blob.content_type == CsvReportWriter.content_type
+    assert len(blob.chunks) > 1
+    assert all(size == 256 * 1024 for size in blob.chunks[:-1])
+    assert 0 < blob.chunks[-1] <= 256 * 1024
+    assert sum(blob.chunks) == blob.size
+
+
+def test_csv_bytes():
+    rows = _rows(2500)
+
+    blob = _write(FakeBucket().blob("reports/a.csv"), CsvReportWriter, rows)
+
+    assert list(csv.reader(io.StringIO(blob.data.decode("utf-8")))) == [
+        REPORT_HEADERS
+    ] + rows
+
+
+def test_spooled_upload_without_blob_open():
+    bucket = FakeBucket()
+    blob = bucket.blob("reports/a.csv")
+    rows = _rows(10)
+
+    _write(_BlobWithoutOpen(blob), CsvReportWriter, rows)
+
+    assert bucket.get_blob("reports/a.csv") is blob
+    assert blob.chunks == []
+    expected = io.StringIO()
+    csv.writer(expected).writerows([REPORT_HEADERS] + rows)
+    assert blob.data == expected.getvalue().encode("utf-8")
+
+
+def test_xls_rolls_over_to_a_new_sheet():
+    xlrd = pytest.importorskip("xlrd")
+    # A primeira aba tem o cabecalho e 65535 linhas
+    rows = _rows(65535 + 10)
+
+    blob = _write(FakeBucket().blob("reports/a.xls"), XlsReportWriter, rows)
+
+    book = xlrd.open_workbook(file_contents=blob.data)
+    first, second = book.sheets()
+    assert (first.name, second.name) == ("Contatos", "Contatos 2")
+    assert first.nrows == 65536
+    assert second.nrows == 11
+    assert first.row_values(0) == REPORT_HEADERS
+    assert second.row_values(0) == REPORT_HEADERS
+    assert first.row_values(65535) == rows[65534]
+    assert second.row_values(1) == rows[65535]
+    assert second.row_values(10) == rows[-1]
+
+
+def test_xlsx_rolls_over_to_a_new_sheet(monkeypatch):
+    if get_writer_class("xlsx") is None:
+        pytest.skip("xlsxwriter is not installed")
+    monkeypatch.setattr(XlsxReportWriter, "max_rows", 100)
+
+    blob = _write(
+        FakeBucket().blob("reports/a.xlsx"), XlsxReportWriter, _rows(250)
+    )
+
+    with zipfile.ZipFile(io.BytesIO(blob.data)) as archive:
+        sheets = [
+            name
+            for name in archive.namelist()
+            if name.startswith("xl/worksheets/sheet")
+        ]
+        workbook = archive.read("xl/workbook.xml").decode("utf-8")
+    assert len(sheets) == 3
+    assert 'name="Contatos 3"' in workbook
+
+
+def test_parquet_bytes():
+    if get_writer_class("parquet") is None:
+        pytest.skip("pyarrow is not installed")
+    import pyarrow.parquet
+
+    rows = _rows(25000)
+    blob = _write(
+        FakeBucket().blob("reports/a.parquet"),
+        get_writer_class("parquet"),
+        rows,
+    )
+
+    table = pyarrow.parquet.read_table(io.BytesIO(blob.data))
+    assert table.column_names == REPORT_HEADERS
+    assert table.num_rows == 25000
+    assert table.column("Email").to_pylist()[-1] == rows[-1][1]
+
+
+def test_generate_report_uploads_to_the_bucket(upstream):
+    from api.reports.reports_api import generate_report
+
+    bucket = FakeBucket()
+    report_writer.set_bucket(bucket)
+    try:
+        payload, code = generate_report("token", "csv")
+    finally:
+        report_writer.set_bucket(None)
+
+    assert code == 200
+    (blob,) = bucket.list_blobs()
+    assert payload == {"url": blob.public_url}
+    assert blob.public
+    lines = list(csv.reader(io.StringIO(blob.data.decode("utf-8"))))
+    assert lines[0] == REPORT_HEADERS
+    # 25 contatos, 2 sem email
+    assert len(lines) == 1 + 23
+    assert [
+        "Contact 1",
+        "user1@domain1.com",
+        "Developer",
+        "Org",
+        "SP",
+        "Campinas",
+    ] in lines
@@ -0,0 +1,216 @@
+"""Incremental user statistics and their Firestore updates."""
+import random
+
+import fireo.database
+import pytest
+from google.api_core.exceptions import FailedPrecondition
+
+from api.models.Statistics import ContactStatistics
+from api.user import user_api
+
+DIMENSIONS = ContactStatistics.USER_DIMENSIONS
+
+
+def _contact(index, organization="Org", city="Campinas", domain=0):
+    return {
+        "id": "c{}".format(index),
+        "name": "Contact {}".format(index),
+        "photo_url": "",
+        "email": "user{}@domain{}.com".format(index, domain),
+        "job": "Developer",
+        "organization": organization,
+        "region": "SP",
+        "city": city,
+    }
+
+
+def _random_contact(rng, index):
+    return _contact(
+        index,
+        organization=rng.choice(["A", "B", "C", "D"]),
+        city=rng.choice(["Campinas", "Santos", "Sorocaba"]),
+        domain=rng.randrange(5),
+    )
+
+
+def _count(contacts):
+    return user_api._count_statistics({"contacts": list(contacts.values())})
+
+
+def test_delta_equals_a_full_recount():
+    rng = random.Random(7)
+    previous = {
+        contact["id"]: contact
+        for contact in (_random_contact(rng, i) for i in range(300))
+    }
+
+    for _round in range(20):
+        current = dict(previous)
+        for contact_id in rng.sample(sorted(current), 20):
+            del current[contact_id]
+        for contact_id in rng.sample(sorted(current), 30):
+            index = int(contact_id[1:])
+            current[contact_id] = _random_contact(rng, index)
+        for _ in range(20):
+            contact = _random_contact(rng, 1000 + rng.randrange(1000))
+            current[contact["id"]] = contact
+
+        statistics = _count(previous)
+        stored = {k: dict(v) for k, v in statistics.items()}
+        removed, added = ContactStatistics.diff(previous, current)
+        changed = ContactStatistics.apply_delta(
+            statistics, removed, added, DIMENSIONS
+        )
+
+        assert statistics == _count(current)
+        assert changed == ContactStatistics.changes(stored, statistics)
+        assert not ContactStatistics.verify(
+            statistics, {"contacts": list(current.values())}, DIMENSIONS
+        )
+        previous = current
+
+
+def test_counters_reaching_zero_are_dropped():
+    previous = {"c1": _contact(1, organization="Old"), "c2": _contact(2)}
+    current = {"c1": _contact(1), "c2": _contact(2)}
+    statistics = _count(previous)
+
+    removed, added = ContactStatistics.diff(previous, current)
+    changed = ContactStatistics.apply_delta(
+        statistics, removed, added, DIMENSIONS
+    )
+
+    assert statistics["organization"] == {"Org": 2}
+    assert changed == {"organization": {"Old": None, "Org": 2}}
+
+
+def test_unchanged_counters_are_not_reported():
+    previous = {"c1": _contact(1, city="Santos"), "c2": _contact(2)}
+    # Trocam de cidade entre si, os totais ficam iguais
+    current = {"c1": _contact(1), "c2": _contact(2, city="Santos")}
+    statistics = _count(previous)
+
+    removed, added = ContactStatistics.diff(previous, current)
+    changed = ContactStatistics.apply_delta(
+        statistics, removed, added, DIMENSIONS
+    )
+
+    assert len(removed) == len(added) == 2
+    assert changed == {}
+    assert statistics == _count(current)
+    assert ContactStatistics.diff(current, dict(current)) == ([], [])
+
+
+def test_verify_reports_the_mismatched_counters():
+    contacts = {"contacts": [_contact(1), _contact(2, organization="B")]}
+    statistics = user_api._count_statistics(contacts)
+    statistics["organization"]["Org"] = 5
+
+    assert ContactStatistics.verify(statistics, contacts, DIMENSIONS) == {
+        "organization": {"Org": (5, 1)}
+    }
+
+
+class _Snapshot:
+    def __init__(self, data, update_time):
+        self._data = data
+        self.exists = data is not None
+        self.update_time = update_time
+
+    def to_dict(self):
+        return self._data
+
+
+class _Document:
+    """Firestore document with update_time preconditions."""
+
+    def __init__(self, data, update_time=1):
+        self.data = data
+        self.update_time = update_time
+        self.updates = []
+
+    def get(self, field_paths=None):
+        return _Snapshot(self.data, self.update_time)
+
+    def update(self, fields, option=None):
+        if option is not None and option != self.update_time:
+            raise FailedPrecondition("Document changed")
+        self.updates.append(fields)
+        self.update_time += 1
+
+
+class _Connection:
+    def write_option(self, last_update_time):
+        return last_update_time
+
+
+class _Database:
+    conn = _Connection()
+
+
+class _Done:
+    """Finished future of ``_read_statistics``."""
+
+    def __init__(self, value):
+        self._value = value
+
+    def result(self):
+        return self._value
+
+
+@pytest.fixture
+def document(monkeypatch):
+    contacts = {"contacts": [_contact(1), _contact(2)]}
+    document = _Document(
+        {
+            "name": "User",
+            "contacts_statistics": user_api._count_statistics(contacts),
+        }
+    )
+    saved = []
+    monkeypatch.setattr(fireo.database, "db", _Database())
+    monkeypatch.setattr(user_api, "_user_document", lambda user_id: document)
+    monkeypatch.setattr(
+        user_api,
+        "_save_user",
+        lambda user_id, name, statistics, chart: saved.append(statistics),
+    )
+    document.saved = saved
+    yield document
+    user_api.counted_contacts.clear()
+
+
+def test_only_changed_counters_are_updated(document):
+    contacts = {"contacts": [_contact(1), _contact(2, organization="B")]}
+
+    user_api.UserApi._save_statistics("u1", "User", contacts)
+
+    (fields,) = document.updates
+    assert fields["contacts_statistics.organization.B"] == 1
+    assert fields["contacts_statistics.organization.Org"] == 1
+    assert not [key for key in fields if ".city." in key]
+    assert fields["contacts_chart"]["organization"]["data"] == [1, 1]
+    assert document.saved == []
+
+
+def test_nothing_is_written_without_changes(document):
+    contacts = {"contacts": [_contact(1), _contact(2)]}
+
+    user_api.UserApi._save_statistics("u1", "User", contacts)
+
+    assert document.updates == []
+    assert document.saved == []
+
+
+def test_failed_precondition_falls_back_to_a_full_save(document):
+    contacts = {"contacts": [_contact(1), _contact(2, organization="B")]}
+    read = document.get()
+    # Outro worker grava o usuario entre a leitura e a escrita
+    document.update_time += 1
+
+    user_api.UserApi._save_statistics(
+        "u1", "User", contacts, document=_Done(read)
+    )
+
+    assert document.updates == []
+    assert document.saved == [user_api._count_statistics(contacts)]